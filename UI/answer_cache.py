@@ -0,0 +1,322 @@
+"""Semantic answer cache for "Ask AI".
+
+The same few questions come up again and again ("what should I eat for
+dinner", "how do I keep warm"), each costing a full watsonx round trip.
+SemanticAnswerCache embeds the question, finds the most similar one asked
+before and, above a similarity threshold, returns its answer instantly –
+but only if both questions have the same content words. Similarity alone
+can't tell "ibuprofen with aspirin" from "ibuprofen with paracetamol";
+a near miss must never get someone else's answer.
+
+Encoders (both local):
+
+* MobileBertEncoder – mean-pooled ``google/mobilebert-uncased`` hidden
+  states, the backbone our NLU model is built on (needs torch and the
+  model already in the local Hugging Face cache – it is never downloaded)
+* HashedNgramEncoder – hashed word + character n-grams, pure NumPy; used
+  when torch/transformers (or the model files) are not available
+
+Entries expire after *ttl* seconds and the least recently used ones are
+evicted beyond *max_entries*. Time-dependent questions ("today", "news",
+"weather" …) are never cached.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+log = logging.getLogger("answer_cache")
+
+_TIME_DEPENDENT = re.compile(
+    r"\b(today|tonight|tomorrow|yesterday|now|current|currently|latest|news|"
+    r"weather|forecast|time|date|this (morning|afternoon|evening|week))\b")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9\s']", " ", text.lower()).split())
+
+
+# ----------------------------------------------------------------------
+# ▸ Encoders -------------------------------------------------------------
+# ----------------------------------------------------------------------
+
+_STOPWORDS = set("""a an the i me my to do does did can could should would will
+    is are am be of for in on at and or it what how why which who give tell some
+    any please with you your""".split())
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ies", "es", "s", "ed", "er", "ly"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def content_words(text: str) -> frozenset[str]:
+    """Stemmed non-stopwords (names and numbers included): two questions
+    are only the same question if these are equal."""
+    words = _normalize(text).split()
+    return frozenset(_stem(w).rstrip("e") for w in words if w not in _STOPWORDS)
+
+
+class HashedNgramEncoder:
+    """
+    Signed feature hashing of content words, word pairs and char 3/4-grams.
+    Lexical only: it catches rewordings of the same question ("how do I
+    sleep better at night?"), not synonyms – keep its threshold high.
+    """
+
+    name, threshold = "ngram", 0.6
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def encode(self, text: str) -> np.ndarray:
+        words = _normalize(text).split()
+        content = [_stem(w) for w in words if w not in _STOPWORDS] or words
+        feats = [(w, 2.0) for w in content]
+        feats += [(f"{a}_{b}", 1.0) for a, b in zip(content, content[1:])]
+        padded = f" {' '.join(content)} "
+        feats += [(padded[i:i + n], 0.5) for n in (3, 4)
+                  for i in range(len(padded) - n + 1)]
+        vec = np.zeros(self.dim, np.float32)
+        for f, weight in feats:
+            h = zlib.crc32(f.encode())
+            vec[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class MobileBertEncoder:
+    """Mean-pooled MobileBERT sentence vectors (loaded on first use)."""
+
+    name, threshold = "mobilebert", 0.93
+
+    def __init__(self, backbone: str = "google/mobilebert-uncased"):
+        self.backbone = backbone
+        self._tok = self._model = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        with self._lock:
+            if self._model is None:
+                import torch  # noqa: F401  (fail early if missing)
+                from transformers import AutoModel, AutoTokenizer
+                # offline only: a kiosk must not fetch hundreds of MB on a lookup
+                self._tok = AutoTokenizer.from_pretrained(self.backbone, local_files_only=True)
+                self._model = AutoModel.from_pretrained(self.backbone,
+                                                        local_files_only=True).eval()
+
+    def encode(self, text: str) -> np.ndarray:
+        import torch
+        self.load()
+        enc = self._tok(_normalize(text), return_tensors="pt",
+                        truncation=True, max_length=64)
+        with torch.inference_mode():
+            hidden = self._model(**enc).last_hidden_state[0]
+        mask = enc["attention_mask"][0].unsqueeze(-1).float()
+        vec = ((hidden * mask).sum(0) / mask.sum()).numpy().astype(np.float32)
+        return vec / np.linalg.norm(vec)
+
+
+def default_encoder():
+    """MobileBERT if it loads here, otherwise the hashed n-gram encoder."""
+    try:
+        enc = MobileBertEncoder()
+        enc.load()
+        return enc
+    except Exception as e:
+        log.info("[CACHE] MobileBERT unavailable (%s) – using n-gram encoder", e)
+        return HashedNgramEncoder()
+
+
+# ----------------------------------------------------------------------
+# ▸ Cache ----------------------------------------------------------------
+# ----------------------------------------------------------------------
+
+@dataclass
+class _Entry:
+    question: str
+    words: frozenset[str]                # content_words(question)
+    answer: str
+    gen_seconds: float                   # what the original answer cost
+    created: float = field(default_factory=time.monotonic)
+    last_hit: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour lookup of past questions → their answers."""
+
+    def __init__(self, encoder_factory=default_encoder, *,
+                 threshold: float | None = None, ttl: float = 7 * 86400,
+                 max_entries: int = 500):
+        self._factory  = encoder_factory
+        self._encoder  = None
+        self.threshold = threshold
+        self.ttl, self.max_entries = ttl, max_entries
+        self._entries: list[_Entry] = []
+        self._vecs: np.ndarray | None = None            # (n, dim), unit rows
+        self._lock  = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "skipped": 0, "not_ready": 0,
+                       "near_misses": 0, "saved_sec": 0.0, "lookup_sec": 0.0}
+
+    # ── public API ────────────────────────────────────────────────────
+    def load(self) -> None:
+        """Build the encoder (slow for MobileBERT – call from a worker).
+        Lookups don't wait for it: until it is ready they are misses."""
+        with self._load_lock:
+            if self._encoder is not None:
+                return
+            encoder = self._factory()
+            with self._lock:
+                self._encoder = encoder
+                if self.threshold is None:
+                    self.threshold = encoder.threshold
+            log.info("[CACHE] answer cache using %s encoder, threshold %.2f",
+                     encoder.name, self.threshold)
+
+    @staticmethod
+    def cacheable(question: str) -> bool:
+        return not _TIME_DEPENDENT.search(question.lower())
+
+    def lookup(self, question: str) -> str | None:
+        """Cached answer for a question similar enough to *question*."""
+        if not self.cacheable(question):
+            with self._lock:
+                self._stats["skipped"] += 1
+            return None
+        t0 = time.perf_counter()
+        encoder = self._ready()
+        if encoder is None:
+            return None
+        vec, words = encoder.encode(question), content_words(question)
+        with self._lock:
+            self._expire()
+            self._stats["lookups"] += 1
+            hit = None
+            if self._entries:
+                sims = self._vecs @ vec
+                for best in np.argsort(-sims):           # most similar first
+                    if sims[best] < self.threshold:
+                        break
+                    if self._entries[best].words == words:
+                        hit = self._entries[best]
+                        hit.hits += 1
+                        hit.last_hit = time.monotonic()
+                        break
+                    self._stats["near_misses"] += 1
+            spent = time.perf_counter() - t0
+            self._stats["lookup_sec"] += spent
+            if hit is None:
+                return None
+            self._stats["hits"] += 1
+            self._stats["saved_sec"] += max(hit.gen_seconds - spent, 0.0)
+            log.info("[CACHE] hit %.2f  %r ≈ %r", float(sims[best]), question, hit.question)
+            return hit.answer
+
+    def store(self, question: str, answer: str, gen_seconds: float) -> None:
+        """Remember *answer* for *question* (it took *gen_seconds* to get)."""
+        if not answer or not self.cacheable(question):
+            return
+        encoder = self._ready()
+        if encoder is None:
+            return
+        vec = encoder.encode(question)
+        with self._lock:
+            self._entries.append(_Entry(question, content_words(question), answer,
+                                        gen_seconds))
+            self._vecs = vec[None] if self._vecs is None else np.vstack([self._vecs, vec])
+            if len(self._entries) > self.max_entries:
+                lru = min(range(len(self._entries)), key=lambda i: self._entries[i].last_hit)
+                self._drop([lru])
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        n = s["lookups"]
+        return {"entries": len(self._entries), "lookups": n, "hits": s["hits"],
+                "hit_rate": s["hits"] / n if n else 0.0,
+                "skipped_time_dependent": s["skipped"],
+                "skipped_not_ready": s["not_ready"],
+                "near_misses_refused": s["near_misses"],
+                "latency_saved_sec": round(s["saved_sec"], 2),
+                "mean_lookup_ms": round(1000 * s["lookup_sec"] / n, 1) if n else None}
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _ready(self):
+        """The encoder, or None (counted) while load() has not finished."""
+        with self._lock:
+            if self._encoder is None:
+                self._stats["not_ready"] += 1
+            return self._encoder
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        old = [i for i, e in enumerate(self._entries) if e.created < cutoff]
+        if old:
+            self._drop(old)
+
+    def _drop(self, idx: list[int]) -> None:
+        keep = sorted(set(range(len(self._entries))) - set(idx))
+        self._entries = [self._entries[i] for i in keep]
+        self._vecs = self._vecs[keep] if keep else None
+
+
+# ─── CLI: similarity of paraphrases vs. unrelated questions ─────────
+if __name__ == "__main__":
+    import sys
+
+    PARAPHRASES = [
+        ("what should I eat for dinner", "What should I have for dinner?"),
+        ("how do I stay warm", "how can I keep warm"),
+        ("how can I sleep better", "How do I sleep better at night?"),
+        ("give me an easy recipe", "Give me a simple recipe."),
+        ("what exercises can I do at home", "What exercise can I do at home?"),
+    ]
+    UNRELATED = [
+        ("what should I eat for dinner", "what should I eat for breakfast"),
+        ("how can I sleep better", "how can I walk better"),
+        ("tell me a joke", "tell me a poem"),
+        ("how do I stay warm", "how do I stay calm"),
+    ]
+    # one word apart, and a different answer: these must never hit
+    NEAR_MISSES = [
+        ("is it safe to take ibuprofen with aspirin",
+         "is it safe to take ibuprofen with paracetamol"),
+        ("how do I stay warm", "how do I stay warm in summer"),
+        ("how much water should I drink", "how much wine should I drink"),
+        ("can I take 2 tablets", "can I take 4 tablets"),
+        ("is it safe to eat eggs", "is it safe to eat raw eggs"),
+    ]
+
+    encoders = [HashedNgramEncoder()]
+    if "--mobilebert" in sys.argv:
+        encoders.append(MobileBertEncoder())
+    failed = False
+    for enc in encoders:
+        cos = lambda a, b: float(enc.encode(a) @ enc.encode(b))
+        para = [cos(a, b) for a, b in PARAPHRASES]
+        unrel = [cos(a, b) for a, b in UNRELATED + NEAR_MISSES]
+        print(f"{enc.name:>10}: paraphrases min {min(para):.2f}, "
+              f"unrelated max {max(unrel):.2f}, threshold {enc.threshold:.2f}")
+
+        cache = SemanticAnswerCache(lambda: enc)
+        cache.load()
+        for q, _ in PARAPHRASES + UNRELATED + NEAR_MISSES:
+            cache.store(q, f"answer to {q}", gen_seconds=3.0)
+        reused = sum(cache.lookup(q) == f"answer to {a}" for a, q in PARAPHRASES)
+        wrong = [q for _, q in UNRELATED + NEAR_MISSES if cache.lookup(q) is not None]
+        print(" " * 12, cache.stats())
+        print(" " * 12, f"paraphrases answered from cache: {reused}/{len(PARAPHRASES)}, "
+              f"wrong answers: {len(wrong)} {wrong}")
+        failed |= bool(wrong)
+    sys.exit(1 if failed else 0)
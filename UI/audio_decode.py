@@ -0,0 +1,215 @@
+"""Incremental decoders that turn TTS payloads into PCM SpeechStreams.
+
+WAV is parsed directly. Watson can also return ``audio/ogg;codecs=opus`` at
+a small fraction of the size of 48 kHz WAV; the Ogg container is demuxed
+here in pure Python and packets are decoded with *opuslib* (optional –
+``pip install opuslib`` plus the ``libopus0`` system package). Without it
+callers fall back to WAV formats.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import wave
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+try:
+    import opuslib
+except Exception:                     # missing wheel *or* missing libopus
+    opuslib = None
+
+# ----------------------------------------------------------------------
+# ▸ PCM stream container + WAV -----------------------------------------
+# ----------------------------------------------------------------------
+
+class SpeechStream(NamedTuple):
+    """Format of a PCM stream plus an iterator over frame-aligned chunks."""
+    rate: int
+    channels: int
+    sampwidth: int
+    chunks: Iterator[bytes]
+
+    def close(self) -> None:
+        """Stop the producer early (closes the HTTP response / file)."""
+        close = getattr(self.chunks, "close", None)
+        if close:
+            close()
+
+
+def wav_stream(blocks: Iterable[bytes],
+                on_close: Callable[[], None] | None = None) -> SpeechStream:
+    """
+    Parse a WAV header from an incremental byte source and return the rest
+    as PCM. Blocks only until the header has arrived; the data-chunk size
+    is ignored because streamed WAVs don't know it up front.
+    """
+    it  = iter(blocks)
+    buf = bytearray()
+
+    def need(n):
+        while len(buf) < n:
+            block = next(it, b"")
+            if not block:
+                raise ValueError("truncated WAV stream")
+            buf.extend(block)
+
+    try:
+        need(12)
+        if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+            raise ValueError("not a WAV stream")
+        pos, fmt = 12, None
+        while True:
+            need(pos + 8)
+            cid  = bytes(buf[pos:pos + 4])
+            size = int.from_bytes(buf[pos + 4:pos + 8], "little")
+            pos += 8
+            if cid == b"data":
+                break
+            need(pos + size)
+            if cid == b"fmt ":
+                fmt = buf[pos:pos + 16]
+            pos += size + (size & 1)
+        if fmt is None:
+            raise ValueError("WAV stream has no fmt chunk")
+    except BaseException:
+        if on_close:
+            on_close()
+        raise
+
+    nch   = int.from_bytes(fmt[2:4], "little")
+    rate  = int.from_bytes(fmt[4:8], "little")
+    width = int.from_bytes(fmt[14:16], "little") // 8
+    frame = nch * width
+
+    def pcm():
+        pending = bytes(buf[pos:])
+        try:
+            while True:
+                cut = len(pending) - len(pending) % frame
+                if cut:
+                    yield pending[:cut]
+                    pending = pending[cut:]
+                block = next(it, b"")
+                if not block:
+                    break
+                pending += block
+        finally:
+            if on_close:
+                on_close()
+
+    return SpeechStream(rate, nch, width, pcm())
+
+
+def finalise_wav(data: bytes) -> bytes:
+    """Patch the RIFF/data sizes of a streamed WAV (sent as 0xFFFFFFFF)."""
+    buf = bytearray(data)
+    pos = 12
+    while pos + 8 <= len(buf):
+        cid  = bytes(buf[pos:pos + 4])
+        size = int.from_bytes(buf[pos + 4:pos + 8], "little")
+        if cid == b"data":
+            buf[pos + 4:pos + 8] = (len(buf) - pos - 8).to_bytes(4, "little")
+            break
+        pos += 8 + size + (size & 1)
+    buf[4:8] = (len(buf) - 8).to_bytes(4, "little")
+    return bytes(buf)
+
+
+def speech_from_wav(path: str | os.PathLike, frames: int = 1024) -> SpeechStream:
+    """Open a WAV file as a SpeechStream (read lazily from disk)."""
+    wf = wave.open(str(path), "rb")
+
+    def pcm():
+        try:
+            yield from iter(lambda: wf.readframes(frames), b"")
+        finally:
+            wf.close()
+
+    return SpeechStream(wf.getframerate(), wf.getnchannels(),
+                        wf.getsampwidth(), pcm())
+
+
+def open_speech(path: str | os.PathLike) -> SpeechStream:
+    """Open a cached payload (WAV or Ogg/Opus, sniffed by magic bytes)."""
+    with open(path, "rb") as fh:
+        magic = fh.read(4)
+    if magic != b"OggS":
+        return speech_from_wav(path)
+    fh = open(path, "rb")
+    return decode_ogg_opus(iter(lambda: fh.read(8192), b""), on_close=fh.close)
+
+
+# ----------------------------------------------------------------------
+# ▸ Ogg/Opus ------------------------------------------------------------
+# ----------------------------------------------------------------------
+
+OPUS_RATE      = 48_000               # decode straight to the DAC rate
+_MAX_FRAME     = OPUS_RATE * 120 // 1000
+_PAGE_HEADER   = struct.Struct("<4sBBqIIIB")
+
+
+def ogg_packets(blocks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield complete Ogg packets from an incremental byte source."""
+    buf, partial = bytearray(), b""
+    for block in blocks:
+        buf.extend(block)
+        while len(buf) >= _PAGE_HEADER.size:
+            magic, _, _, _, _, _, _, nseg = _PAGE_HEADER.unpack_from(buf)
+            if magic != b"OggS":
+                raise ValueError("lost Ogg sync")
+            lacing_end = _PAGE_HEADER.size + nseg
+            if len(buf) < lacing_end:
+                break
+            lacing = buf[_PAGE_HEADER.size:lacing_end]
+            page_end = lacing_end + sum(lacing)
+            if len(buf) < page_end:
+                break
+            pos = lacing_end
+            for lace in lacing:
+                partial += bytes(buf[pos:pos + lace])
+                pos += lace
+                if lace < 255:                 # packet ends in this page
+                    yield partial
+                    partial = b""
+            del buf[:page_end]
+
+
+def decode_ogg_opus(blocks: Iterable[bytes],
+                    on_close: Callable[[], None] | None = None) -> SpeechStream:
+    """
+    Decode an Ogg/Opus byte stream to 48 kHz int16 PCM as it arrives.
+    Blocks only until the OpusHead packet has been read.
+    """
+    if opuslib is None:
+        raise RuntimeError("opuslib is not installed – Ogg/Opus unavailable")
+    packets = ogg_packets(blocks)
+    try:
+        head = next(packets, b"")
+        if not head.startswith(b"OpusHead"):
+            raise ValueError("not an Ogg/Opus stream")
+    except BaseException:
+        if on_close:
+            on_close()
+        raise
+    channels = head[9]
+    pre_skip = struct.unpack_from("<H", head, 10)[0] * channels * 2
+    decoder  = opuslib.Decoder(OPUS_RATE, channels)
+
+    def pcm():
+        skip = pre_skip
+        try:
+            for pkt in packets:
+                if pkt.startswith((b"OpusHead", b"OpusTags")):
+                    continue
+                out = decoder.decode(pkt, _MAX_FRAME)
+                if skip:
+                    cut, skip = min(skip, len(out)), skip - min(skip, len(out))
+                    out = out[cut:]
+                if out:
+                    yield out
+        finally:
+            if on_close:
+                on_close()
+
+    return SpeechStream(OPUS_RATE, channels, 2, pcm())
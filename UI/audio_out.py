@@ -0,0 +1,220 @@
+"""Single audio-output scheduler for everything the kiosk says.
+
+AI replies, news readings and any other speech go through ONE long-lived
+PyAudio output stream, served from a priority queue:
+
+    Priority.AI_REPLY  >  Priority.NEWS  >  Priority.BACKGROUND
+
+A job that is playing is pre-empted (cancelled) as soon as something more
+important is queued; every job gets a CancelToken its owner can cancel at
+any time. While speech plays, a "duck" callback lowers the music player.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+from enum import IntEnum
+from typing import Callable
+
+import numpy as np
+import pyaudio
+
+from audio_decode import SpeechStream
+from resample import resample_stream, to_int16_stream
+
+log = logging.getLogger("audio")
+
+
+class Priority(IntEnum):
+    AI_REPLY   = 0
+    NEWS       = 1
+    BACKGROUND = 2
+
+
+class CancelToken:
+    """Handle for one queued job: cancel it, or wait until it has finished."""
+
+    def __init__(self):
+        self._cancel = threading.Event()
+        self._done   = threading.Event()
+        self.reason: str | None = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._cancel.is_set():
+            self.reason = reason
+            self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class _Job:
+    __slots__ = ("speech", "priority", "token", "on_start", "on_done")
+
+    def __init__(self, speech, priority, token, on_start, on_done):
+        self.speech, self.priority, self.token = speech, priority, token
+        self.on_start, self.on_done = on_start, on_done
+
+
+class AudioScheduler:
+    """Priority queue in front of one hot output stream (int16, fixed rate)."""
+
+    def __init__(self, *, rate: int = 48_000, channels: int = 1,
+                 device_index: int | None = None,
+                 idle_close_sec: float = 60.0):
+        self.rate, self.channels = rate, channels
+        self.device_index   = device_index
+        self.idle_close_sec = idle_close_sec
+        self._ducker: Callable[[bool], None] | None = None
+        self._ducked = False
+        self._heap: list = []
+        self._seq  = itertools.count()
+        self._cv   = threading.Condition()
+        self._current: _Job | None = None
+        self._pa = self._stream = None
+        threading.Thread(target=self._run, name="audio-out", daemon=True).start()
+
+    # ── public API ────────────────────────────────────────────────────
+    def set_ducker(self, fn: Callable[[bool], None] | None) -> None:
+        """fn(True) when speech starts, fn(False) once the queue drains."""
+        self._ducker = fn
+
+    def submit(self, speech: SpeechStream, priority: Priority = Priority.NEWS, *,
+               on_start: Callable[[CancelToken], None] | None = None,
+               on_done: Callable[[CancelToken], None] | None = None) -> CancelToken:
+        """Queue *speech*; returns the token that cancels it."""
+        token = CancelToken()
+        job = _Job(speech, Priority(priority), token, on_start, on_done)
+        with self._cv:
+            heapq.heappush(self._heap, (job.priority, next(self._seq), job))
+            self._cv.notify()
+        return token
+
+    def cancel_all(self, max_priority: Priority = Priority.BACKGROUND) -> None:
+        """Cancel queued and playing jobs at or above *max_priority* level."""
+        with self._cv:
+            for _, _, job in self._heap:
+                if job.priority <= max_priority:
+                    job.token.cancel()
+            if self._current and self._current.priority <= max_priority:
+                self._current.token.cancel()
+
+    # ── worker thread ─────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._heap:
+                    if not self._cv.wait(timeout=self.idle_close_sec):
+                        self._close_output()         # idle: release the device
+                _, _, job = heapq.heappop(self._heap)
+                self._current = job
+            try:
+                if not job.token.cancelled:
+                    self._play(job)
+            except Exception:
+                log.exception("audio job failed")
+                self._close_output()                 # reopen on next job
+            finally:
+                job.speech.close()
+                with self._cv:
+                    self._current = None
+                    more_speech = any(j.priority < Priority.BACKGROUND
+                                      for _, _, j in self._heap)
+                if self._ducked and not more_speech:
+                    self._duck(False)
+                job.token._done.set()
+                if job.on_done:
+                    job.on_done(job.token)
+
+    def _play(self, job: _Job):
+        if job.on_start:
+            job.on_start(job.token)
+        if job.priority < Priority.BACKGROUND and not self._ducked:
+            self._duck(True)
+        stream = self._output()
+        for chunk in self._convert(job.speech):
+            if job.token.cancelled:
+                break
+            if self._preempted(job):
+                job.token.cancel("preempted")
+                log.info("[AUDIO] %s pre-empted", job.priority.name)
+                break
+            stream.write(chunk)
+
+    def _preempted(self, job: _Job) -> bool:
+        dead = []
+        with self._cv:
+            # cancelled jobs never play, so they must not pre-empt either
+            while self._heap and self._heap[0][2].token.cancelled:
+                dead.append(heapq.heappop(self._heap)[2])
+            preempt = bool(self._heap) and self._heap[0][0] < job.priority
+        for j in dead:
+            self._discard(j)
+        return preempt
+
+    def _discard(self, job: _Job) -> None:
+        """Finish a cancelled job that was dropped before it reached the output."""
+        job.speech.close()
+        job.token._done.set()
+        if job.on_done:
+            job.on_done(job.token)
+
+    # ── format conversion / device handling ──────────────────────────
+    def _convert(self, speech: SpeechStream):
+        rate, nch, width, chunks = speech
+        chunks = to_int16_stream(chunks, width)     # 8/24/32-bit WAVs too
+        if nch != self.channels:
+            chunks = self._remix(chunks, nch)
+        if rate != self.rate:
+            chunks = resample_stream(chunks, rate, self.rate, self.channels)
+        return chunks
+
+    def _remix(self, chunks, nch):
+        for chunk in chunks:
+            x = np.frombuffer(chunk, "<i2").reshape(-1, nch)
+            if self.channels == 1:
+                y = x.mean(axis=1).astype("<i2")
+            else:
+                y = np.repeat(x[:, :1], self.channels, axis=1)
+            yield y.tobytes()
+
+    def _output(self):
+        if self._stream is None:
+            self._pa = pyaudio.PyAudio()
+            kw = dict(format=pyaudio.paInt16, channels=self.channels,
+                      rate=self.rate, output=True)
+            try:
+                self._stream = self._pa.open(output_device_index=self.device_index, **kw)
+            except OSError:
+                # fallback: let ALSA 'default' plug handle the conversion
+                self._stream = self._pa.open(**kw)
+        return self._stream
+
+    def _close_output(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            finally:
+                self._stream = None
+                self._pa.terminate()
+                self._pa = None
+
+    def _duck(self, on: bool):
+        self._ducked = on
+        if self._ducker:
+            try:
+                self._ducker(on)
+            except Exception:
+                log.exception("ducking failed")
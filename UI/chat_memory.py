@@ -0,0 +1,157 @@
+"""Short-term conversation memory for "Ask AI".
+
+Keeps the recent question/answer turns of one conversation so follow-ups
+("and tomorrow?", "how long does that take?") make sense, while the
+prompt stays inside a fixed token budget however long the chat gets:
+
+* the newest *verbatim_turns* turns are included word for word
+* older turns are squeezed into one "Earlier:" line (question plus the
+  first sentence of the answer, truncated), oldest dropped first
+* after *idle_reset* seconds of silence a new conversation starts – on a
+  shared kiosk that is usually a different person
+
+Token counts are estimates (words × TOKENS_PER_WORD); watsonx reports the
+real input count for blocking calls.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+TOKENS_PER_WORD = 1.4
+
+_FIRST_SENTENCE = re.compile(r"(.+?[.!?])(\s|$)")
+_FOLLOW_UP = re.compile(
+    r"^(and|but|so|also|then|what about|how about|why|really)\b|"
+    r"\b(it|its|it's|that|this|those|these|they|them|he|she|there)\b")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text.split()) * TOKENS_PER_WORD)
+
+
+def _clip(text: str, words: int) -> str:
+    parts = text.split()
+    return " ".join(parts[:words]) + ("…" if len(parts) > words else "")
+
+
+@dataclass
+class Turn:
+    question: str
+    answer: str
+    at: float
+
+
+class ChatMemory:
+    """Bounded history plus a token-budgeted prompt builder."""
+
+    def __init__(self, *, budget_tokens: int = 450, verbatim_turns: int = 3,
+                 max_turns: int = 12, idle_reset: float = 600.0,
+                 template: str = "Reply in one paragraph. {question}"):
+        self.budget_tokens  = budget_tokens
+        self.verbatim_turns = verbatim_turns
+        self.max_turns      = max_turns
+        self.idle_reset     = idle_reset
+        self.template       = template
+        self._turns: list[Turn] = []
+        self._lock = threading.Lock()
+
+    # ── history ───────────────────────────────────────────────────────
+    def add(self, question: str, answer: str) -> None:
+        with self._lock:
+            self._expire()
+            self._turns.append(Turn(question.strip(), answer.strip(), time.monotonic()))
+            del self._turns[:-self.max_turns]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._turns.clear()
+
+    def active(self) -> bool:
+        with self._lock:
+            self._expire()
+            return bool(self._turns)
+
+    def is_follow_up(self, question: str) -> bool:
+        """Does *question* probably lean on the previous turns?"""
+        q = question.lower().strip()
+        return self.active() and (len(q.split()) < 4 or bool(_FOLLOW_UP.search(q)))
+
+    # ── prompt assembly ──────────────────────────────────────────────
+    def build_prompt(self, question: str) -> tuple[str, dict]:
+        """
+        Prompt for *question* with as much history as the budget allows.
+        Returns (prompt, info) with the estimated token count and how many
+        turns went in verbatim / summarised / were left out.
+        """
+        tail = self.template.format(question=question.strip())
+        with self._lock:
+            self._expire()
+            turns = list(self._turns)
+
+        budget = self.budget_tokens - estimate_tokens(tail)
+        recent, older = turns[-self.verbatim_turns:], turns[:-self.verbatim_turns]
+
+        # newest first, so the most recent context survives a tight budget
+        verbatim = []
+        for t in reversed(recent):
+            block = f"Q: {t.question}\nA: {t.answer}"
+            cost = estimate_tokens(block)
+            if cost > budget:
+                older = turns[:turns.index(t) + 1]
+                break
+            verbatim.insert(0, block)
+            budget -= cost
+
+        notes = []
+        for t in reversed(older):
+            m = _FIRST_SENTENCE.match(t.answer)
+            note = f"{_clip(t.question, 12)} – {_clip(m.group(1) if m else t.answer, 20)}"
+            cost = estimate_tokens(note) + 1
+            if cost > budget:
+                break
+            notes.insert(0, note)
+            budget -= cost
+
+        parts = []
+        if notes:
+            parts.append("Earlier: " + "; ".join(notes))
+        parts += verbatim
+        if parts:
+            parts.insert(0, "Our conversation so far:")
+        parts.append(tail)
+        prompt = "\n".join(parts)
+        return prompt, {"tokens": estimate_tokens(prompt),
+                        "verbatim": len(verbatim), "summarised": len(notes),
+                        "dropped": len(turns) - len(verbatim) - len(notes)}
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _expire(self) -> None:
+        if self._turns and time.monotonic() - self._turns[-1].at > self.idle_reset:
+            self._turns.clear()
+
+
+# ─── CLI: prompt size per turn – stateless vs. full history vs. budget ───
+if __name__ == "__main__":
+    answer = ("A warm bowl of vegetable soup with wholemeal bread is a good choice. "
+              "It is light, easy to make and full of vitamins, and you can add "
+              "lentils or beans if you would like more protein.")
+    questions = ["what should I eat for dinner", "and for lunch tomorrow?",
+                 "how long does that take to cook", "is it good for my heart",
+                 "what about for breakfast", "can I freeze it"] * 4
+
+    memory, full = ChatMemory(), []
+    print("turn  stateless  full history  budgeted (verbatim/summarised/dropped)")
+    for i, q in enumerate(questions, 1):
+        stateless = estimate_tokens(memory.template.format(question=q))
+        full.append(f"Q: {q}\nA: {answer}")
+        everything = estimate_tokens("\n".join(full))
+        prompt, info = memory.build_prompt(q)
+        memory.add(q, answer)
+        if i in (1, 2, 3, 4, 6, 8, 12, 16, 20, 24):
+            print(f"{i:4d}  {stateless:9d}  {everything:12d}  {info['tokens']:8d} "
+                  f"({info['verbatim']}/{info['summarised']}/{info['dropped']})")
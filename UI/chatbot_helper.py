@@ -1,6 +1,8 @@
-import os, io, contextlib, logging
+import os, io, re, contextlib, logging, time, threading
+from concurrent.futures import Future
+from typing import Iterable, Iterator
 from dotenv import load_dotenv
-from ibm_watsonx_ai import APIClient, Credentials
+from ibm_auth import IBM
 
 # ─── environment ------------------------------------------------------------
 load_dotenv()
@@ -10,12 +12,6 @@ apikey         = os.getenv("WATSONX_API_KEY")
 project_id     = os.getenv("WATSONX_PROJECT_ID")
 model_id       = os.getenv("WATSONX_MODEL_ID")
 
-if not all([watsonx_ai_url, apikey, project_id, model_id]):
-    raise ValueError("Missing required environment variables.")
-
-credentials = Credentials(url=watsonx_ai_url, api_key=apikey)
-client      = APIClient(credentials)
-
 params = {
     "decoding_method": "greedy",
     "temperature": 0.7,
@@ -24,6 +20,11 @@ params = {
 
 # ─── build the model, silencing *stdout* and *stderr* ───────────────────────
 def _make_model():
+    if not all([watsonx_ai_url, apikey, project_id, model_id]):
+        raise ValueError("Missing required environment variables.")
+
+    # shared IAM token, renewed in the background (see ibm_auth.py)
+    client = IBM.watsonx_client(watsonx_ai_url, apikey)
     buf = io.StringIO()
     # also damp the IBM SDK logger just in case
     logging.getLogger("ibm_watsonx_ai").setLevel(logging.ERROR)
@@ -39,12 +40,161 @@ def _make_model():
             params=params,
         )
 
-model = _make_model()  # global, reused by every call
+# ─── lazy, background initialisation ────────────────────────────────────────
+# Building the client means importing ibm_watsonx_ai and several network
+# round trips, so it is NOT done at import time: the UI calls start() once
+# it is on screen, and every generate call waits on `ready` (the model,
+# or the exception that stopped it from being built).
+ready: Future = Future()
+_start_lock = threading.Lock()
 
-# ─── public helper ----------------------------------------------------------
-def get_response(prompt: str) -> str:
+def _init() -> None:
+    t0 = time.perf_counter()
     try:
-        response = model.generate_text(
+        ready.set_result(_make_model())
+        logging.getLogger("chatbot").info("watsonx client ready after %.2f s",
+                                          time.perf_counter() - t0)
+    except Exception as e:
+        ready.set_exception(e)
+
+def start() -> Future:
+    """Begin building the model in a background thread (idempotent)."""
+    with _start_lock:
+        if not ready.running() and not ready.done():
+            ready.set_running_or_notify_cancel()
+            threading.Thread(target=_init, name="watsonx-init", daemon=True).start()
+    return ready
+
+def _model():
+    """The shared ModelInference, blocking until it has been built."""
+    return start().result()
+
+# ─── public helpers ---------------------------------------------------------
+def prewarm() -> None:
+    """Make sure the shared IAM token is valid before the next generate call."""
+    IBM.token(apikey)
+
+# ─── paragraph mode ---------------------------------------------------------
+# The kiosk only ever shows/speaks ONE paragraph, so don't let the model
+# write more: stop at the first blank line, and cap the budget at what a
+# spoken paragraph needs (~120 words ≈ 170 tokens) instead of 1000.
+PARAGRAPH_TEMPLATE = "Reply in one paragraph. {question}"
+PARAGRAPH_WORDS    = 120
+TOKENS_PER_WORD    = 1.4
+PARAGRAPH_PARAMS   = {
+    **params,
+    "max_new_tokens": int(PARAGRAPH_WORDS * TOKENS_PER_WORD),
+    "stop_sequences": ["\n\n", "\nQ:"],    # blank line / next turn (chat_memory)
+    "include_stop_sequence": False,
+}
+
+_SENTENCE_END   = (".", "!", "?", "…", '"', "'", ")")
+_QUESTION_WORDS = {"what", "what's", "how", "why", "who", "when", "where", "which",
+                   "can", "could", "is", "are", "do", "does", "should", "will", "would"}
+
+
+def _paragraph_prompt(prompt: str) -> str:
+    """End the question as a sentence on its own line, so the model starts
+    the answer instead of finishing the user's sentence."""
+    prompt = prompt.strip()
+    if prompt and not prompt.endswith(_SENTENCE_END):
+        words = prompt.rsplit(". ", 1)[-1].split()     # the user's part
+        prompt += "?" if words and words[0].lower() in _QUESTION_WORDS else "."
+    return prompt + "\n"
+
+
+def _continue_prompt(prompt: str, continued: str) -> str:
+    """*prompt* (already shaped by _paragraph_prompt) followed by the model's
+    own continuation of the user's sentence, for it to carry on from. The
+    continuation is not re-punctuated; blocking and streaming retries both
+    use this."""
+    return prompt + continued.strip() + "\n\n"
+
+
+_ANSWER_LABEL = re.compile(r"^\s*A:\s*")     # echo of the chat_memory format
+
+
+def _strip_label(pieces: Iterable[str]) -> Iterator[str]:
+    """Drop a leading "A:" the model may copy from the history format."""
+    head, it = "", iter(pieces)
+    for piece in it:
+        head += piece
+        if len(head) >= 3:
+            break
+    head = _ANSWER_LABEL.sub("", head)
+    if head:
+        yield head
+    yield from it
+
+
+def shape_reply(text: str, *, truncated: bool = False) -> str:
+    """
+    First answer paragraph of a completion.
+
+    * leading blank lines are ignored
+    * a first line that isn't capitalised is the model continuing the
+      prompt – it is dropped (leaving "" if nothing follows it)
+    * if the token budget cut the text (*truncated*), the unfinished last
+      sentence is removed
+    """
+    lines = [l.strip() for l in _ANSWER_LABEL.sub("", text.strip()).split("\n")]
+    if lines[0] and not lines[0][0].isupper():
+        lines = lines[1:]
+    while lines and not lines[0]:
+        lines.pop(0)
+    para = lines[0] if lines else ""
+    if truncated:
+        cut = max(para.rfind(p) for p in ".!?")
+        if cut > 0:
+            para = para[:cut + 1]
+    return para
+
+
+def generate_paragraph(prompt: str) -> tuple[str, dict]:
+    """
+    One-paragraph completion with stop sequences and a token budget.
+    Returns (reply, usage) where usage has the generated/input token
+    counts, the stop reason and the wall time in seconds.
+    """
+    t0 = time.perf_counter()
+    prompt = _paragraph_prompt(prompt)
+    result = _model().generate_text(prompt=prompt, params=PARAGRAPH_PARAMS,
+                                 raw_response=True)["results"][0]
+    text  = result.get("generated_text", "")
+    usage = {"generated_tokens": result.get("generated_token_count", 0),
+             "input_tokens": result.get("input_token_count", 0),
+             "stop_reason": result.get("stop_reason")}
+    reply = shape_reply(text, truncated=usage["stop_reason"] == "max_tokens")
+    if not reply and text.strip():
+        # it only finished the user's sentence, then hit the stop sequence:
+        # let it carry on from there once
+        more = _model().generate_text(prompt=_continue_prompt(prompt, text),
+                                   params=PARAGRAPH_PARAMS, raw_response=True)["results"][0]
+        usage["generated_tokens"] += more.get("generated_token_count", 0)
+        usage["stop_reason"] = more.get("stop_reason")
+        reply = shape_reply(more.get("generated_text", ""),
+                            truncated=usage["stop_reason"] == "max_tokens") or text.strip()
+    usage["seconds"] = time.perf_counter() - t0
+    return reply, usage
+
+
+class ChatbotError(RuntimeError):
+    """watsonx did not produce a reply (client unavailable, API error …)."""
+
+
+ERROR_REPLY = "An error occurred while generating the response."
+
+
+def get_response(prompt: str, *, paragraph: bool = False, raise_errors: bool = False) -> str:
+    """The model's reply to *prompt* (one capped paragraph with *paragraph*,
+    see generate_paragraph). On failure it returns ERROR_REPLY, or
+    raises ChatbotError with *raise_errors* (so callers can tell the two
+    apart, e.g. to keep errors out of caches)."""
+    try:
+        if paragraph:
+            return generate_paragraph(prompt)[0]
+
+        response = _model().generate_text(
             prompt=prompt
         )
         response = response.split("\n")    
@@ -56,5 +206,107 @@ def get_response(prompt: str) -> str:
             return response[0]
     
     except Exception as e:
+        if raise_errors:
+            raise ChatbotError(str(e)) from e
         print(f"Error: {str(e)}")
-        return "An error occurred while generating the response."
+        return ERROR_REPLY
+
+
+# ─── streaming ---------------------------------------------------------------
+def _answer_paragraph(pieces: Iterable[str], skipped: list[str]) -> Iterator[str]:
+    """
+    Pass through the first answer paragraph of a token stream, then stop.
+
+    Same rule as shape_reply(): if the model starts by continuing the
+    prompt (first line not capitalised), that line is collected in
+    *skipped* and the answer is the next non-blank one.
+    """
+    state = "lead"
+    for piece in pieces:
+        out = []
+        for ch in piece:
+            if state == "lead":
+                if ch.isspace():
+                    continue
+                if not skipped and not ch.isupper():
+                    state = "skip"
+                    skipped.append(ch)
+                    continue
+                state = "answer"
+            if state == "skip":
+                if ch == "\n":
+                    state = "lead"
+                else:
+                    skipped.append(ch)
+                continue
+            if ch == "\n":                       # end of the paragraph
+                if out:
+                    yield "".join(out)
+                return
+            out.append(ch)
+        if out:
+            yield "".join(out)
+
+
+def stream_response(prompt: str) -> Iterator[str]:
+    """
+    Yield the reply text piece by piece as watsonx generates it, in
+    paragraph mode: the stop sequence and token budget end generation at
+    the first paragraph, and the stream is closed as soon as it is done.
+    """
+    yield from _stream_paragraph(_paragraph_prompt(prompt), retry=True)
+
+
+def _stream_paragraph(prompt: str, *, retry: bool) -> Iterator[str]:
+    stream = _model().generate_text_stream(prompt=prompt, params=PARAGRAPH_PARAMS)
+    skipped, answered = [], False
+    try:
+        for piece in _strip_label(_answer_paragraph(stream, skipped)):
+            answered = True
+            yield piece
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+    if not answered and skipped and retry:
+        # only the user's sentence was finished – carry on from there once,
+        # exactly as generate_paragraph() does
+        yield from _stream_paragraph(_continue_prompt(prompt, "".join(skipped)),
+                                     retry=False)
+
+
+# ─── benchmark: default vs. paragraph mode ──────────────────────────────────
+BENCH_PROMPTS = [
+    "what should I wear today if it is cold and windy",
+    "Give me an easy recipe for dinner.",
+    "How can I sleep better at night?",
+    "tell me a fun fact about London",
+    "What are some gentle exercises I can do at home?",
+    "why is the sky blue",
+    "Suggest a good book to read this week.",
+    "How do I remember to take my tablets?",
+]
+
+if __name__ == "__main__":
+    rows = []
+    for q in BENCH_PROMPTS:
+        prompt = PARAGRAPH_TEMPLATE.format(question=q)
+
+        t0 = time.perf_counter()
+        raw = _model().generate_text(prompt=prompt, raw_response=True)["results"][0]
+        before = (raw.get("generated_token_count", 0), time.perf_counter() - t0)
+
+        reply, usage = generate_paragraph(prompt)
+        after = (usage["generated_tokens"], usage["seconds"])
+        rows.append((before, after))
+        print(f"{q[:44]:<44} {before[0]:5d} tok {before[1]:5.2f} s → "
+              f"{after[0]:4d} tok {after[1]:5.2f} s  [{usage['stop_reason']}]")
+        print(f"    {reply[:100]}")
+
+    n = len(rows)
+    tok_b = sum(b[0] for b, _ in rows) / n
+    tok_a = sum(a[0] for _, a in rows) / n
+    sec_b = sum(b[1] for b, _ in rows) / n
+    sec_a = sum(a[1] for _, a in rows) / n
+    print(f"\nmean over {n} prompts: {tok_b:.0f} → {tok_a:.0f} tokens generated "
+          f"({1 - tok_a / tok_b:.0%} fewer), {sec_b:.2f} → {sec_a:.2f} s wall time")
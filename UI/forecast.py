@@ -0,0 +1,175 @@
+"""Forecast timeline: answer "tomorrow morning in Leeds" from one cached call.
+
+OpenWeather's 5-day / 3-hour forecast is fetched once per refresh window
+(through a WeatherCache, so it is keyed by city, served stale while it
+revalidates and kept on disk) and indexed by timestamp. A B-time phrase
+from the NLU ("tonight", "tomorrow morning", "on friday", "in 3 hours") is
+resolved to a moment in the city's local time, and the two forecast steps
+around it are interpolated – no further network round trip.
+
+    icon, line = forecast_line(FORECAST.get("Leeds"), "tomorrow morning")
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+
+from gazetteer import location_params
+from http_client import HTTP
+from weather_cache import EMOJI, Reading
+
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+
+PERIOD_HOURS = {"morning": 9, "noon": 12, "midday": 12, "lunchtime": 12,
+                "afternoon": 15, "evening": 19, "tonight": 22, "night": 22}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+_IN_HOURS = re.compile(r"\bin (an?|\d+) (hour|hours)\b")
+_CLOCK    = re.compile(r"\b(\d{1,2})(?::(\d\d))?\s*(am|pm)\b|\b(\d{1,2}):(\d\d)\b")
+_NOW      = re.compile(r"\b(now|currently|right now|at the moment)\b")
+
+
+def fetch_forecast(city: str) -> dict:
+    """One OpenWeather 5-day / 3-hour forecast call (metric, English)."""
+    key = os.getenv("OPENWEATHER_KEY")
+    if not key:
+        raise RuntimeError("OPENWEATHER_KEY missing")
+    r = HTTP.get(FORECAST_URL, params=dict(location_params(city), appid=key,
+                                           units="metric", lang="en"), timeout=8)
+    r.raise_for_status()
+    return r.json()
+
+
+def resolve_time(phrase: str, now: float, tz_offset: int = 0) -> float | None:
+    """
+    UTC timestamp for a spoken time *phrase*, read in the city's local time
+    (*tz_offset* seconds east of UTC). None if it means "now" or could not
+    be understood.
+    """
+    s = phrase.lower()
+    if not s.strip() or _NOW.search(s):
+        return None
+    m = _IN_HOURS.search(s)
+    if m:
+        return now + 3600 * (1 if m.group(1) in ("a", "an") else int(m.group(1)))
+    if "later" in s and not any(w in s for w in PERIOD_HOURS):
+        return now + 3 * 3600
+
+    local = datetime.fromtimestamp(now + tz_offset, timezone.utc)
+    days = None
+    if "day after tomorrow" in s:
+        days = 2
+    elif "tomorrow" in s:
+        days = 1
+    elif "today" in s or "tonight" in s or "this " in s:
+        days = 0
+    else:
+        day = next((i for i, d in enumerate(WEEKDAYS) if d in s), None)
+        if day is not None:
+            days = (day - local.weekday()) % 7
+            if days == 0 and "next" in s:
+                days = 7
+
+    hour, minute = None, 0
+    m = _CLOCK.search(s)
+    if m and m.group(3):
+        hour = int(m.group(1)) % 12 + (12 if m.group(3) == "pm" else 0)
+        minute = int(m.group(2) or 0)
+    elif m:
+        hour, minute = int(m.group(4)), int(m.group(5))
+    else:
+        hour = next((h for w, h in PERIOD_HOURS.items() if w in s), None)
+
+    if days is None and hour is None:
+        return None
+    if days is None:                       # "at 6 pm" / "in the evening": next one
+        days = 0 if (hour, minute) > (local.hour, local.minute) else 1
+    if hour is None:
+        hour = 12                          # a whole day: midday is representative
+    target = (local + timedelta(days=days)).replace(hour=hour, minute=minute,
+                                                    second=0, microsecond=0)
+    return target.timestamp() - tz_offset
+
+
+class ForecastTimeline:
+    """Forecast steps indexed by timestamp, linearly interpolated between them."""
+
+    NUMERIC = ("temp", "feels_like", "humidity")
+
+    def __init__(self, payload: dict):
+        self.steps = sorted(payload.get("list", []), key=lambda st: st["dt"])
+        self.times = [st["dt"] for st in self.steps]
+        self.tz_offset = payload.get("city", {}).get("timezone", 0)
+        self.step = (self.times[1] - self.times[0]) if len(self.times) > 1 else 3 * 3600
+
+    def covers(self, ts: float) -> bool:
+        return bool(self.times) and \
+            self.times[0] - self.step <= ts <= self.times[-1] + self.step
+
+    def at(self, ts: float) -> dict | None:
+        """Conditions at *ts*: numbers interpolated, weather from the nearer step."""
+        if not self.covers(ts):
+            return None
+        i = bisect_right(self.times, ts)
+        a = self.steps[max(i - 1, 0)]
+        b = self.steps[min(i, len(self.steps) - 1)]
+        w = 0.0 if a is b else (ts - a["dt"]) / (b["dt"] - a["dt"])
+        w = min(max(w, 0.0), 1.0)
+        out = {"time": ts}
+        for k in self.NUMERIC:
+            out[k] = a["main"][k] + w * (b["main"][k] - a["main"][k])
+        out["pop"]  = a.get("pop", 0.0) + w * (b.get("pop", 0.0) - a.get("pop", 0.0))
+        out["wind"] = a["wind"]["speed"] + w * (b["wind"]["speed"] - a["wind"]["speed"])
+        near = a if w < 0.5 else b
+        out["main"] = near["weather"][0]["main"]
+        out["description"] = near["weather"][0]["description"]
+        return out
+
+
+def forecast_line(reading: Reading | None, phrase: str,
+                  now: float | None = None) -> tuple[str, str] | None:
+    """
+    (emoji, line) for *phrase* from a cached forecast *reading*, or None if
+    the phrase means "now" (the caller shows current conditions instead).
+    """
+    if reading is None:
+        return None
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    timeline = ForecastTimeline(reading.data)
+    ts = resolve_time(phrase, now, timeline.tz_offset)
+    if ts is None or ts <= now + 1800:
+        return None
+    when = phrase.strip()
+    point = timeline.at(ts)
+    if point is None:
+        return "📅", f"{reading.city}, {when}: no forecast that far ahead"
+    rain = f", {point['pop']:.0%} chance of rain" if point["pop"] >= 0.2 else ""
+    return (EMOJI.get(point["main"], "🌈"),
+            f"{reading.city}, {when}: {point['description']}, {point['temp']:.1f} °C{rain}")
+
+
+# ─── CLI: time-sliced questions answered from one forecast payload ──
+if __name__ == "__main__":
+    import time
+
+    now = time.time()
+    base = int(now // 10800 + 1) * 10800                     # next 3-hour boundary
+    conds = [("Clouds", "overcast clouds"), ("Rain", "light rain"), ("Clear", "clear sky")]
+    payload = {"city": {"name": "Leeds", "timezone": 3600},
+               "list": [{"dt": base + 10800 * i,
+                         "main": {"temp": 8 + 4 * ((i % 8) in (3, 4, 5)) + 0.25 * i,
+                                  "feels_like": 6 + 0.2 * i, "humidity": 80 - i},
+                         "weather": [{"main": conds[i % 3][0], "description": conds[i % 3][1]}],
+                         "pop": (i % 3 == 1) * 0.7, "wind": {"speed": 3 + (i % 4)}}
+                        for i in range(40)]}
+    reading = Reading("Leeds", payload, now)
+
+    for q in ["tonight", "tomorrow morning", "tomorrow", "this evening", "in 2 hours",
+              "at 6 pm", "on saturday afternoon", "next week", "now"]:
+        t0 = time.perf_counter()
+        line = forecast_line(reading, q, now)
+        dt = (time.perf_counter() - t0) * 1e6
+        print(f"{q!r:26} {dt:6.0f} µs  {line[1] if line else '(current conditions)'}")
@@ -0,0 +1,260 @@
+"""Offline city gazetteer: turn a spoken location slot into a known place.
+
+STT misspellings ("manchestor", "edinborough") used to go straight to
+OpenWeather and come back as an API error. The gazetteer resolves the
+slot locally first, in three steps:
+
+1. exact match on the normalised name (dict)
+2. whole-word prefix match ("newcastle" → Newcastle upon Tyne) on a
+   sorted name array (bisect – a compact stand-in for a trie)
+3. fuzzy match: candidates sharing the most character trigrams, ranked by
+   bounded edit distance (none for names of 4 letters or fewer, one edit
+   up to 6 letters)
+
+Fuzzy correction is only safe when the gazetteer knows (nearly) every
+city: with just the bundled list, "Bergen" would become Berlin and "Nome"
+Rome, where OpenWeather's own ``q=`` search gets them right. So it is
+off by default until the full city list is loaded (``Gazetteer.full``);
+before that, callers ask for it only once OpenWeather has not found the
+name as heard.
+
+Places come from ``UI/cities.csv`` (bundled: UK towns and world cities,
+coordinates only) and, if present, OpenWeather's own ``city.list.json``
+(or ``.json.gz``) in ``data/`` – which adds their numeric city IDs.
+Weather calls then query by ID, or by coordinates, never by free text.
+
+    place = GAZETTEER.resolve("manchestor")   # Place(name='Manchester', …)
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+log = logging.getLogger("gazetteer")
+
+SEED_CSV  = Path(__file__).resolve().parent / "cities.csv"
+CITY_LIST = Path(__file__).resolve().parent.parent / "data" / "city.list.json"
+
+
+def normalise(name: str) -> str:
+    """Lower-case ASCII words: "São Paulo" → "sao paulo", "Stoke-on-Trent" → "stoke on trent"."""
+    ascii_ = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", ascii_.lower()).split())
+
+
+def _trigrams(norm: str) -> set[str]:
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returns limit + 1) once it exceeds *limit*."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class Place(NamedTuple):
+    name: str
+    country: str
+    lat: float
+    lon: float
+    ow_id: int | None = None          # OpenWeather city ID, when known
+
+    @property
+    def key(self) -> str:
+        """Stable cache key, the same whichever source the place came from."""
+        return f"{normalise(self.name)},{self.country.lower()}"
+
+    def query(self) -> dict:
+        """OpenWeather location parameters for this place."""
+        if self.ow_id:
+            return {"id": self.ow_id}
+        return {"lat": self.lat, "lon": self.lon}
+
+
+class Gazetteer:
+    """Exact, prefix and fuzzy lookup over a list of places."""
+
+    def __init__(self, places=(), *, prefer_country: str = "GB", full: bool = False):
+        self.prefer_country = prefer_country.upper()
+        self.full = full                  # holds (nearly) every city: fuzzy is safe
+        self._lock = threading.Lock()
+        self._build(list(places))
+
+    # ── public API ────────────────────────────────────────────────────
+    def add(self, places) -> None:
+        """Merge more places in (e.g. a big city list loaded in the background)."""
+        with self._lock:
+            merged = {p.key: p for p in self._ix["places"]}
+            for p in places:
+                old = merged.get(p.key)
+                if old is None or (p.ow_id and not old.ow_id):
+                    merged[p.key] = p
+            self._build(list(merged.values()))
+
+    def lookup(self, name: str) -> Place | None:
+        """Exact (normalised) match only."""
+        hits = self._ix["exact"].get(normalise(name))
+        return self._best(hits) if hits else None
+
+    def complete(self, prefix: str, n: int = 5) -> list[Place]:
+        """Places whose normalised name starts with *prefix*, preferred first."""
+        norm = normalise(prefix)
+        if not norm:
+            return []
+        ix = self._ix
+        names, out = ix["sorted"], []
+        i = bisect_left(names, norm)
+        while i < len(names) and names[i].startswith(norm):
+            out += ix["exact"][names[i]]
+            i += 1
+        return sorted(out, key=self._rank)[:n]
+
+    def resolve(self, text: str, *, fuzzy: bool | None = None,
+                max_distance: int = 3) -> Place | None:
+        """Best place for a (possibly misheard) location slot, or None.
+        *fuzzy* (default: ``self.full``) allows correcting misspellings."""
+        norm = normalise(text)
+        if not norm:
+            return None
+        hits = self._ix["exact"].get(norm)
+        if hits:
+            return self._best(hits)
+        prefixed = [p for p in self.complete(norm, 50)
+                    if normalise(p.name)[len(norm):len(norm) + 1] == " "]
+        if prefixed:
+            return prefixed[0]
+        if not (self.full if fuzzy is None else fuzzy):
+            return None
+        return self._fuzzy(norm, max_distance)
+
+    def __len__(self) -> int:
+        return len(self._ix["places"])
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _build(self, places: list[Place]) -> None:
+        exact: dict[str, list[Place]] = {}
+        for p in places:
+            exact.setdefault(normalise(p.name), []).append(p)
+        sorted_names = sorted(exact)
+        grams: dict[str, array] = {}
+        for i, norm in enumerate(sorted_names):
+            for g in _trigrams(norm):
+                grams.setdefault(g, array("I")).append(i)
+        # swapped in whole, so readers never see half an index
+        self._ix = {"places": places, "exact": exact, "sorted": sorted_names,
+                    "grams": grams, "order": {p: i for i, p in enumerate(places)}}
+
+    def _rank(self, p: Place):
+        return (p.country != self.prefer_country, self._ix["order"].get(p, 0))
+
+    def _best(self, hits: list[Place]) -> Place:
+        return min(hits, key=self._rank)
+
+    def _fuzzy(self, norm: str, max_distance: int) -> Place | None:
+        ix = self._ix
+        if len(norm) <= 4:                # "nome" is not a typo for "rome"
+            return None
+        # ~1 typo per 3 letters, but only one in short names ("bergen" ≠ "berlin")
+        limit = 1 if len(norm) <= 6 else min(max_distance, (len(norm) + 1) // 3)
+        shared: Counter = Counter()
+        for g in _trigrams(norm):
+            shared.update(ix["grams"].get(g, ()))
+        best, best_d = None, limit + 1
+        for i, _ in shared.most_common(12):
+            name = ix["sorted"][i]
+            d = edit_distance(norm, name, limit)
+            if d > limit:
+                continue
+            place = self._best(ix["exact"][name])
+            if d < best_d or (d == best_d and self._rank(place) < self._rank(best)):
+                best, best_d = place, d
+        return best
+
+
+def load_places(path: str | os.PathLike) -> list[Place]:
+    """Places from our CSV (name,country,lat,lon[,ow_id]) or OpenWeather's city list."""
+    path = Path(path)
+    if path.suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as fh:
+            return [Place(r["name"], r["country"], float(r["lat"]), float(r["lon"]),
+                          int(r["ow_id"]) if r.get("ow_id") else None)
+                    for r in csv.DictReader(fh)]
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        rows = json.load(fh)
+    countries = {c.strip().upper() for c in os.getenv("GAZETTEER_COUNTRIES", "").split(",")
+                 if c.strip()}
+    return [Place(r["name"], r["country"], r["coord"]["lat"], r["coord"]["lon"], r["id"])
+            for r in rows if r.get("name") and (not countries or r["country"] in countries)]
+
+
+def load_city_list() -> int:
+    """Merge data/city.list.json(.gz) into GAZETTEER if it is there (slow – run
+    from a worker), which enables fuzzy correction unless GAZETTEER_COUNTRIES
+    left most of the world out. Returns how many places the gazetteer holds
+    afterwards."""
+    for path in (CITY_LIST, CITY_LIST.with_suffix(".json.gz")):
+        if path.exists():
+            GAZETTEER.add(load_places(path))
+            GAZETTEER.full = not os.getenv("GAZETTEER_COUNTRIES", "").strip()
+            log.info("[GAZETTEER] %d places after loading %s", len(GAZETTEER), path.name)
+            break
+    return len(GAZETTEER)
+
+
+def location_key(city: str) -> str:
+    """Cache key for a city: the resolved place, else the normalised text."""
+    place = GAZETTEER.lookup(city)
+    return place.key if place else normalise(city)
+
+
+def location_params(city: str) -> dict:
+    """OpenWeather location parameters: ID or coordinates if we know the
+    place, otherwise the free-text ``q=`` search."""
+    place = GAZETTEER.lookup(city)
+    return place.query() if place else {"q": city}
+
+
+GAZETTEER = Gazetteer(load_places(SEED_CSV),
+                      prefer_country=os.getenv("AIWEATHER_COUNTRY", "GB"))
+
+
+# ─── CLI: misheard slots → places, and how long resolving takes ──────
+if __name__ == "__main__":
+    import time
+
+    load_city_list()
+    SLOTS = ["leeds", "manchestor", "edinborough", "newcastle", "glasgo", "birmingam",
+             "new york", "sao paulo", "perth", "londn", "zurik", "atlantis",
+             "bergen", "nome"]
+    print(f"fuzzy correction {'on (full list)' if GAZETTEER.full else 'forced on for the demo'}")
+    for s in SLOTS:
+        t0 = time.perf_counter()
+        for _ in range(100):
+            place = GAZETTEER.resolve(s, fuzzy=True)
+        us = (time.perf_counter() - t0) / 100 * 1e6
+        where = f"{place.name}, {place.country} {place.query()}" if place else "—"
+        print(f"{s!r:15} {us:7.1f} µs  {where}")
+    print(f"{len(GAZETTEER)} places")
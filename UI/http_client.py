@@ -0,0 +1,267 @@
+"""Shared HTTP client for every REST call the kiosk makes.
+
+One ``requests.Session`` for the whole process instead of a bare
+``requests.get`` per call:
+
+* per-host keep-alive pools – repeat calls to OpenWeather / Guardian skip
+  TCP + TLS set-up entirely (the open TLS connection is reused)
+* a small DNS cache used by this client's connections only (TTL, and the
+  last good answer is served if the resolver fails – handy on flaky
+  Wi-Fi); the rest of the process resolves as usual
+* default (connect, read) timeouts and a couple of retries on idempotent
+  requests that hit connection errors or 5xx/429 – all within a total
+  deadline, so a call never takes much longer than that however it fails
+* per-host metrics: requests, errors, latency, new vs. reused connections
+
+    from http_client import HTTP
+    r = HTTP.get(url, params=…)        # drop-in for requests.get
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError
+
+log = logging.getLogger("http")
+
+DEFAULT_TIMEOUT  = (3.05, 10)       # (connect, read) seconds, per attempt
+DEFAULT_DEADLINE = 15.0             # seconds for a whole call, retries included
+RETRY_STATUS     = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT       = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+# ----------------------------------------------------------------------
+# ▸ DNS cache -----------------------------------------------------------
+# ----------------------------------------------------------------------
+
+class DNSCache:
+    """TTL cache of resolved addresses, for this client's connections."""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: dict[tuple, tuple[float, list[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.stale = 0
+
+    def resolve(self, host: str, port: int) -> list[str]:
+        """Addresses to try for *host*, in resolver order (IP literals pass
+        through)."""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit and now - hit[0] < self.ttl:
+                self.hits += 1
+                return hit[1]
+        try:
+            infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+            addrs = list(dict.fromkeys(info[4][0] for info in infos))
+        except socket.gaierror:
+            if hit:                          # resolver down: last good answer
+                with self._lock:
+                    self.stale += 1
+                return hit[1]
+            raise
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now, addrs)
+        return addrs
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "stale": self.stale,
+                    "entries": len(self._entries)}
+
+
+def _pool_class(pool_cls, conn_cls, dns: DNSCache, on_connect):
+    """*pool_cls* whose connections resolve through *dns* and report each
+    new socket to *on_connect(host)*. The hostname is still used for TLS
+    (SNI, certificate check) – only the lookup changes."""
+
+    class Connection(conn_cls):
+        def _new_conn(self):
+            # .host is derived from _dns_host, so keep the name we were given
+            name, host, error = self.host, self._dns_host, None
+            try:
+                addrs = dns.resolve(host, self.port)
+            except socket.gaierror as e:
+                raise NameResolutionError(name, self, e) from e
+            try:
+                for addr in addrs:                  # in turn, like create_connection
+                    self._dns_host = addr
+                    try:
+                        sock = super()._new_conn()
+                    except Exception as e:
+                        error = e
+                        continue
+                    on_connect(name)
+                    return sock
+            finally:
+                self._dns_host = host
+            raise error
+
+    return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": Connection})
+
+
+class _Adapter(HTTPAdapter):
+    """HTTPAdapter whose pools use the client's DNS cache."""
+
+    def __init__(self, dns: DNSCache, on_connect, **kw):
+        self._dns, self._on_connect = dns, on_connect
+        super().__init__(**kw)
+
+    def init_poolmanager(self, *args, **kw):
+        super().init_poolmanager(*args, **kw)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _pool_class(HTTPConnectionPool, HTTPConnection,
+                                self._dns, self._on_connect),
+            "https": _pool_class(HTTPSConnectionPool, HTTPSConnection,
+                                 self._dns, self._on_connect),
+        }
+
+
+# ----------------------------------------------------------------------
+# ▸ Client ---------------------------------------------------------------
+# ----------------------------------------------------------------------
+
+def _clip(timeout, left: float):
+    """A per-attempt timeout that cannot outlast the deadline."""
+    left = max(left, 0.1)
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return left if timeout is None else min(timeout, left)
+
+
+class HttpClient:
+    """Pooled session with default timeouts, retries and per-host metrics."""
+
+    def __init__(self, *, timeout=DEFAULT_TIMEOUT, deadline: float = DEFAULT_DEADLINE,
+                 pool_size: int = 8, retries: int = 2, backoff: float = 0.3,
+                 dns_ttl: float = 300.0):
+        self.timeout  = timeout
+        self.deadline = deadline
+        self.retries, self.backoff = retries, backoff
+        self.dns = DNSCache(dns_ttl)
+        self._adapter = _Adapter(self.dns, self._connected, pool_connections=pool_size,
+                                 pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self._lock  = threading.Lock()
+        self._hosts = defaultdict(lambda: {"requests": 0, "errors": 0, "retries": 0,
+                                           "new_connections": 0,
+                                           "time_sum": 0.0, "time_max": 0.0})
+
+    def request(self, method: str, url: str, *, deadline: float | None = None,
+                **kw) -> requests.Response:
+        """
+        One call, retried on connection errors, timeouts and 5xx/429 if
+        idempotent – but never started or waited on past *deadline*
+        seconds (default: the client's) from now.
+        """
+        timeout = kw.pop("timeout", self.timeout)
+        host = urlsplit(url).hostname or "?"
+        t0 = time.perf_counter()
+        end = time.monotonic() + (self.deadline if deadline is None else deadline)
+        attempts = 1 + (self.retries if method.upper() in IDEMPOTENT else 0)
+        for attempt in range(attempts):
+            resp = error = None
+            try:
+                resp = self.session.request(method, url,
+                                            timeout=_clip(timeout, end - time.monotonic()),
+                                            **kw)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.RequestException:
+                self._record(host, time.perf_counter() - t0, error=True)
+                raise
+            if resp is not None and resp.status_code not in RETRY_STATUS:
+                break
+            pause = self.backoff * 2 ** attempt
+            if attempt + 1 == attempts or time.monotonic() + pause >= end:
+                break
+            if resp is not None:
+                resp.close()
+            with self._lock:
+                self._hosts[host]["retries"] += 1
+            time.sleep(pause)
+        if resp is None:
+            self._record(host, time.perf_counter() - t0, error=True)
+            raise error
+        self._record(host, time.perf_counter() - t0, error=resp.status_code >= 400)
+        return resp
+
+    def get(self, url: str, **kw) -> requests.Response:
+        return self.request("GET", url, **kw)
+
+    def post(self, url: str, **kw) -> requests.Response:
+        return self.request("POST", url, **kw)
+
+    def stats(self) -> dict:
+        """Per host: requests, errors, retries, mean/max latency (ms) and
+        how many connections had to be opened for them."""
+        with self._lock:
+            out = {}
+            for host, s in self._hosts.items():
+                n, new = s["requests"], s["new_connections"]
+                out[host] = {"requests": n, "errors": s["errors"], "retries": s["retries"],
+                             "mean_ms": round(1000 * s["time_sum"] / n, 1) if n else None,
+                             "max_ms": round(1000 * s["time_max"], 1),
+                             "new_connections": new,
+                             "reused": max(n - new, 0)}
+        out["dns"] = self.dns.stats()
+        return out
+
+    def _connected(self, host: str) -> None:
+        with self._lock:
+            self._hosts[host]["new_connections"] += 1
+
+    def _record(self, host: str, dt: float, *, error: bool) -> None:
+        with self._lock:
+            s = self._hosts[host]
+            s["requests"] += 1
+            s["errors"] += error
+            s["time_sum"] += dt
+            s["time_max"] = max(s["time_max"], dt)
+
+
+HTTP = HttpClient()       # process-wide instance
+
+
+# ─── CLI: cold requests.get vs. pooled client against one host ──────
+if __name__ == "__main__":
+    import sys
+
+    url = sys.argv[1] if len(sys.argv) > 1 else "https://content.guardianapis.com/"
+    n = 10
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        requests.get(url, timeout=DEFAULT_TIMEOUT)
+    cold = (time.perf_counter() - t0) / n
+
+    HTTP.get(url)                                # open the pool
+    t0 = time.perf_counter()
+    for _ in range(n):
+        HTTP.get(url)
+    warm = (time.perf_counter() - t0) / n
+
+    print(f"{url}\n  requests.get : {cold * 1000:6.0f} ms/request\n"
+          f"  HTTP.get     : {warm * 1000:6.0f} ms/request")
+    print(HTTP.stats())
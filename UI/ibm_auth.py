@@ -0,0 +1,229 @@
+"""Shared IBM Cloud credentials: one IAM token per API key, refreshed early.
+
+Every Watson / watsonx caller asks this module for its client instead of
+building its own:
+
+    IBM.service(SpeechToTextV1, api_key, url)     # ibm_watson services
+    IBM.watsonx_client(url, api_key)              # ibm_watsonx_ai APIClient
+    IBM.token(api_key)                            # raw bearer token
+
+Clients are built once per (class, key, url) and kept, so their HTTP
+sessions keep connections alive between calls. Each token's refresh point
+is moved *refresh_lead* seconds earlier than the SDK's, and a daemon thread
+calls get_token() every *check_every* seconds, so the renewal happens there
+rather than on a user-facing request. Token fetches are counted (see stats()).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
+from ibm_cloud_sdk_core.token_managers.iam_token_manager import IAMTokenManager
+
+log = logging.getLogger("ibm_auth")
+
+
+def _mask(api_key: str) -> str:
+    return "****" + api_key[-4:]
+
+
+class _EarlyTokenManager(IAMTokenManager):
+    """IAMTokenManager whose refresh point comes *lead* seconds early and
+    which reports every token fetch to *on_fetch*."""
+
+    def __init__(self, apikey: str, *, url: str | None, lead: float, on_fetch):
+        super().__init__(apikey, url=url)
+        self.lead, self.on_fetch = lead, on_fetch
+
+    def request_token(self) -> dict:
+        resp = super().request_token()
+        self.on_fetch()
+        return resp
+
+    def _save_token_info(self, token_response: dict) -> None:
+        super()._save_token_info(token_response)
+        with self.lock:
+            self.refresh_time -= self.lead
+
+
+class CredentialManager:
+    """Per-API-key IAM authenticators and long-lived service clients."""
+
+    def __init__(self, *, refresh_lead: float = 120.0, check_every: float = 30.0,
+                 iam_url: str | None = None):
+        self.refresh_lead = refresh_lead
+        self.check_every  = check_every
+        self.iam_url      = iam_url
+        self._auth: dict[str, IAMAuthenticator] = {}
+        self._clients: dict[tuple, object] = {}
+        self._listeners: dict[str, list] = {}
+        self._fetches: dict[str, deque] = {}     # api key → fetch timestamps
+        self._lock    = threading.RLock()
+        self._started = time.monotonic()
+        self._thread: threading.Thread | None = None
+
+    # ── public API ────────────────────────────────────────────────────
+    def authenticator(self, api_key: str) -> IAMAuthenticator:
+        """The shared IAMAuthenticator for *api_key* (built on first use)."""
+        if not api_key:
+            raise RuntimeError("IBM API key is missing – set it in UI/.env")
+        with self._lock:
+            auth = self._auth.get(api_key)
+            if auth is None:
+                auth = IAMAuthenticator(api_key, url=self.iam_url)
+                auth.token_manager = _EarlyTokenManager(
+                    api_key, url=self.iam_url, lead=self.refresh_lead,
+                    on_fetch=partial(self._fetched, api_key))
+                self._auth[api_key] = auth
+                self._start_refresher()
+            return auth
+
+    def token(self, api_key: str) -> str:
+        """A valid access token for *api_key* (cached; fetched if expired)."""
+        return self.authenticator(api_key).token_manager.get_token()
+
+    def service(self, cls, api_key: str, url: str, **kw):
+        """One long-lived ``cls(authenticator=…)`` per (cls, key, url)."""
+        if not url:
+            raise RuntimeError(f"{cls.__name__} service URL is missing – set it in UI/.env")
+        key = (cls, api_key, url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = cls(authenticator=self.authenticator(api_key), **kw)
+                client.set_service_url(url)
+                self._clients[key] = client
+            return client
+
+    def watsonx_client(self, url: str, api_key: str):
+        """An ``ibm_watsonx_ai.APIClient`` running on our token."""
+        key = ("watsonx", api_key, url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                from ibm_watsonx_ai import APIClient, Credentials
+                client = APIClient(Credentials(url=url, token=self.token(api_key)))
+                self._listeners.setdefault(api_key, []).append(client.set_token)
+                self._clients[key] = client
+            return client
+
+    def refresh_due(self) -> int:
+        """Renew every token past its (early) refresh point; returns how many.
+        The SDK's get_token() makes the decision, under its own lock."""
+        with self._lock:
+            items = list(self._auth.items())
+        renewed = 0
+        for api_key, auth in items:
+            tm = auth.token_manager
+            old = tm.access_token
+            try:
+                token = tm.get_token()
+            except Exception as e:
+                log.warning("[IAM] refresh for %s failed: %s", _mask(api_key), e)
+                continue
+            if token == old:
+                continue
+            renewed += 1
+            for notify in self._listeners.get(api_key, ()):
+                try:
+                    notify(token)
+                except Exception:
+                    log.exception("[IAM] token listener failed")
+        return renewed
+
+    def stats(self) -> dict:
+        """Token fetches per key: total, in the last hour, and hourly average."""
+        hours = max((time.monotonic() - self._started) / 3600, 1 / 60)
+        cutoff = time.monotonic() - 3600
+        with self._lock:
+            return {_mask(k): {"fetched": len(ts),
+                               "last_hour": sum(t >= cutoff for t in ts),
+                               "per_hour": round(len(ts) / hours, 1)}
+                    for k, ts in self._fetches.items()} | {"clients": len(self._clients)}
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _fetched(self, api_key: str) -> None:
+        with self._lock:
+            self._fetches.setdefault(api_key, deque(maxlen=10_000)).append(time.monotonic())
+        log.info("[IAM] token fetched for %s", _mask(api_key))
+
+    def _start_refresher(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop,
+                                            name="iam-refresh", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.check_every)
+            try:
+                self.refresh_due()
+            except Exception:
+                log.exception("[IAM] refresh loop error")
+
+
+IBM = CredentialManager()       # process-wide instance
+
+
+# ─── CLI: token fetches, client-per-call vs. shared manager ─────────
+if __name__ == "__main__":
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from unittest import mock
+
+    import jwt
+    from ibm_cloud_sdk_core.token_managers.jwt_token_manager import JWTTokenManager
+
+    TTL, CALLS_PER_HOUR, HOURS = 3600, 120, 3      # IAM tokens live 60 min
+    clock = [1_700_000_000]
+
+    class FakeIAM(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            now = clock[0]
+            token = jwt.encode({"iat": now, "exp": now + TTL}, "x" * 32, algorithm="HS256")
+            body = json.dumps({"access_token": token, "expires_in": TTL,
+                               "expiration": now + TTL}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeIAM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    iam_url = f"http://127.0.0.1:{server.server_port}"
+
+    with mock.patch.object(JWTTokenManager, "_get_current_time",
+                           staticmethod(lambda: clock[0])):
+        step = 3600 // CALLS_PER_HOUR
+
+        # before: a fresh IAMAuthenticator per request (the old stt.py)
+        before = 0
+        for _ in range(CALLS_PER_HOUR * HOURS):
+            before += 1 if IAMAuthenticator("k", url=iam_url).token_manager.get_token() else 0
+            clock[0] += step
+
+        # after: one shared manager, refresher ticking every 30 s
+        mgr = CredentialManager(iam_url=iam_url)
+        mgr._start_refresher = lambda: None          # drive it by hand
+        for i in range(CALLS_PER_HOUR * HOURS):
+            mgr.token("k")
+            for _ in range(step // 30):
+                clock[0] += 30
+                mgr.refresh_due()
+        after = mgr.stats()["****k"]["fetched"]
+    server.shutdown()
+
+    print(f"{CALLS_PER_HOUR} requests/hour over {HOURS} h, {TTL // 60}-min tokens")
+    print(f"  authenticator per request : {before / HOURS:.0f} token fetches/hour")
+    print(f"  shared CredentialManager  : {after / HOURS:.1f} token fetches/hour "
+          f"(only the first on the request path)")
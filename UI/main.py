@@ -3,17 +3,17 @@
 #  ⚠️  Pi-only version – tuned for Raspberry Pi 4B + 7" HDMI touchscreen
 # ------------------------------------------------------------------
 
-import os, webbrowser, html, re, csv, json, logging, wave, uuid, tempfile, requests
+import os, webbrowser, re, csv, json, logging, wave
 from logging.handlers import RotatingFileHandler
 from collections import defaultdict, deque
 from datetime import datetime
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
 import threading
 from threading import Event
-from time import monotonic
-import audioop
+from time import monotonic, perf_counter
+_BOOT_T0 = perf_counter()                    # for the time-to-first-frame log
 import pyaudio
 import yt_dlp
 
@@ -32,6 +32,7 @@ from kivy.resources import resource_add_path
 from kivy.core.text import LabelBase
 from kivy.app import App
 from kivy.clock import Clock
+from kivy.core.window import Window
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
@@ -43,6 +44,7 @@ from kivy.uix.textinput import TextInput
 from kivy.metrics import dp
 from kivy.animation import Animation
 from requests.exceptions import RequestException
+from http_client import HTTP
 from infer_onnx import infer_onnx as nlu_infer
 
 # ─── .env loading ─────────────────────────────────────────────────────────────
@@ -53,17 +55,50 @@ except ImportError:
     pass
 
 # ─── IBM Watson helpers ───────────────────────────────────────────────────────
-from stt import transcribe_audio_ibm
-from tts import text_to_speech_ibm
+from stt import transcribe, LOCAL_STT
+from stt import prewarm as prewarm_stt
+from tts import synthesize_cached
+from audio_decode import SpeechStream, open_speech, speech_from_wav
+from tts import CACHE as TTS_CACHE
+from tts import prewarm as prewarm_tts
+from ibm_auth import IBM
+from tts_backends import TTSRouter, LocalTTSBackend, CloudTTSBackend
+from tts_pipeline import SpeechPipeline, SentenceSplitter
+from answer_cache import SemanticAnswerCache
+from chat_memory import ChatMemory
+from audio_out import AudioScheduler, Priority
+from weather_cache import WeatherCache
+from forecast import fetch_forecast, forecast_line
+from usage_stats import SlotUsage
+from gazetteer import GAZETTEER, load_city_list, location_key
+from news_feed import GuardianNewsAPI, NewsFeed
+from news_store import NewsStore
+from news_topics import TopicBuffers
 
 # ─── Watsonx.ai Chatbot Setup ──────────────────────────────────────
-from chatbot_helper import get_response
+from chatbot_helper import get_response, stream_response, PARAGRAPH_TEMPLATE
+from chatbot_helper import ChatbotError, ERROR_REPLY
+from chatbot_helper import prewarm as prewarm_chatbot
+from chatbot_helper import ready as CHATBOT_READY, start as start_chatbot
+
+# old behaviour, for comparison: build the watsonx client before the UI
+EAGER_CHATBOT = os.getenv("AIWEATHER_EAGER_CHATBOT") == "1"
+if EAGER_CHATBOT:
+    start_chatbot().exception()              # wait, but don't raise
 
 # ─── constants ────────────────────────────────────────────────────────────────
 WEATHER_REFRESH_SEC    = 600      # 10 min
+WEATHER_FRESH_SEC      = 540      # cached reading served without a call; < refresh
+FORECAST_FRESH_SEC     = 3 * 3600 # 5-day/3-hourly forecast: one call per window
+WEATHER_PREFETCH_CITIES = 4       # most-asked cities kept warm on the timer
 NEWS_REFRESH_SEC       = 300      # 5 min
+NEWS_PREFETCH_TOPICS   = 4        # most-asked topics kept warm in memory
 MAX_REMINDERS_PER_SLOT = 3
 MAX_RECORD_SEC         = 60
+STREAM_TTS             = True     # play audio while it is synthesised
+STREAM_LLM             = True     # render/speak the reply while it is generated
+DUCK_LEVEL             = 0.3      # music volume while speech plays
+PREWARM_MIN_GAP_SEC    = 20       # don't re-warm on rapid mic taps
 
 # ─── Audio-device discovery (USB mic / speaker) ──────────────────────────────
 ### PI MOD – find the first PyAudio device that contains "USB" in its name
@@ -116,58 +151,68 @@ def record_to_wav(path: str, stop_evt: Event, max_sec: int = MAX_RECORD_SEC) ->
     except Exception:
         logging.exception("Failed to record audio")
 
+# ─── one hot output stream, shared by every speech source ────────────────────
+AUDIO = AudioScheduler(device_index=USB_SPK_INDEX)
+
 def play_wav(path: str):
+    """Play a WAV file through the USB speaker and wait until it has finished."""
+    AUDIO.submit(speech_from_wav(path), Priority.BACKGROUND).wait()
+
+
+# ─── semantic answer cache in front of watsonx ───────────────────────────────
+ANSWER_CACHE = SemanticAnswerCache()
+
+def cached_response(question: str, prompt: str | None = None, *,
+                    use_cache: bool = True, store: bool = True) -> str:
+    """Ask AI's one-paragraph get_response(), answered from ANSWER_CACHE when
+    the same question was asked before. The cache only ever holds these
+    paragraph replies. The reply is only stored with *store* – not when
+    *prompt* carried conversation history the bare question doesn't.
+    Raises ChatbotError if watsonx fails."""
+    answer = ANSWER_CACHE.lookup(question) if use_cache else None
+    if answer:
+        return answer
+    t0 = perf_counter()
+    answer = get_response(prompt or question, paragraph=True, raise_errors=True)
+    if use_cache and store:
+        ANSWER_CACHE.store(question, answer, perf_counter() - t0)
+    return answer
+
+
+# ─── multi-turn memory for Ask AI (token-budgeted prompts) ───────────────────
+CHAT_MEMORY = ChatMemory(template=PARAGRAPH_TEMPLATE)
+
+
+# ─── speculative network prewarm (runs while the user is speaking) ───────────
+_last_prewarm = 0.0
+
+def prewarm_network():
     """
-    Play a WAV file through the USB speaker.
-    If the file's sample-rate isn't 44 100 or 48 000 Hz, resample to 48 k.
+    Refresh IAM tokens and open keep-alive TLS connections to STT (needed
+    as soon as the mic is released), then TTS and watsonx (needed next).
+    Failures are only logged – the real request will retry everything.
     """
-    wf = wave.open(path, 'rb')
-    pa = pyaudio.PyAudio()
-
-    raw_rate = wf.getframerate()
-    samp_w   = wf.getsampwidth()
-    nch      = wf.getnchannels()
-
-    # Acceptable hardware rates for almost every USB DAC
-    OK = (44100, 48000)
-
-    if raw_rate not in OK:
-        # ── on-the-fly upsample to 48 kHz using std-lib audioop ──────────
-        frames = wf.readframes(wf.getnframes())
-        frames, _ = audioop.ratecv(frames, samp_w, nch,
-                                   raw_rate, 48000, None)
-        raw_rate = 48000
-        wf.close()                  # we'll feed the bytes from memory
-        data_iter = (frames[i:i+1024] for i in range(0, len(frames), 1024))
-    else:
-        # ── stream straight from disk ────────────────────────────────────
-        data_iter = iter(lambda: wf.readframes(1024), b'')
+    global _last_prewarm
+    if monotonic() - _last_prewarm < PREWARM_MIN_GAP_SEC:
+        return
+    _last_prewarm = monotonic()
+    for name, warm in (("stt", prewarm_stt), ("tts", prewarm_tts),
+                       ("watsonx", prewarm_chatbot)):
+        t0 = perf_counter()
+        try:
+            warm()
+            logger.info("[NET] %s prewarmed in %.0f ms", name, (perf_counter() - t0) * 1000)
+        except Exception as e:
+            logger.warning("[NET] %s prewarm failed: %s", name, e)
 
-    try:
-        stream = pa.open(format=pa.get_format_from_width(samp_w),
-                         channels=nch,
-                         rate=raw_rate,
-                         output=True,
-                         output_device_index=USB_SPK_INDEX)
-    except OSError:
-        # fallback: let ALSA 'default' plug handle the conversion
-        stream = pa.open(format=pa.get_format_from_width(samp_w),
-                         channels=nch,
-                         rate=raw_rate,
-                         output=True)
-
-    for chunk in data_iter:
-        if not chunk:
-            break
-        stream.write(chunk)
-
-    stream.stop_stream()
-    stream.close()
-    pa.terminate()
+
+# ─── speech back-ends: espeak-ng for short text, Watson for long-form ────────
+TTS_ROUTER = TTSRouter(LocalTTSBackend(), CloudTTSBackend())
 
 
 # ─── Thread pool & logging (unchanged) ───────────────────────────────────────
 EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+
 log_dir  = Path.home() / "aiweather"
 log_dir.mkdir(exist_ok=True)
 logger = logging.getLogger("nlu")
@@ -195,11 +240,33 @@ if not csv_path.exists():
     with csv_path.open("w", newline="", encoding="utf-8") as f:
         csv.writer(f).writerow(["timestamp", "raw_text", "intent", "slots_json"])
 
+USAGE = SlotUsage(csv_path)          # what users ask for most, for prefetching
+
 def _append_csv(ts, raw, intent, slots):
     with csv_path.open("a", newline="", encoding="utf-8") as f:
         csv.writer(f).writerow([ts, raw, intent,
                                 json.dumps(slots, ensure_ascii=False)])
 
+# ─── weather readings: served from cache, revalidated in the background ──────
+WEATHER = WeatherCache(path=Path(__file__).resolve().parent.parent / "data" / "weather_cache.json",
+                       ttl=WEATHER_FRESH_SEC, key=location_key, executor=EXECUTOR)
+FORECAST = WeatherCache(fetch_forecast,
+                        Path(__file__).resolve().parent.parent / "data" / "forecast_cache.json",
+                        ttl=FORECAST_FRESH_SEC, max_age=24 * 3600, key=location_key,
+                        executor=EXECUTOR)
+
+def canonical_city(text: str, *, fuzzy: bool | None = None) -> str:
+    """The gazetteer's name for a (possibly misheard) city, else *text*.
+    Misspellings are only corrected with *fuzzy* (default: once the full
+    city list is loaded)."""
+    place = GAZETTEER.resolve(text, fuzzy=fuzzy)
+    if place and place.name.casefold() != text.casefold():
+        logger.info("[WEATHER] location %r → %s, %s", text, place.name, place.country)
+    return place.name if place else text
+
+# ─── last headlines per keyword on disk: instant boot, usable offline ────────
+NEWS_STORE = NewsStore(Path(__file__).resolve().parent.parent / "data" / "news_cache.json.gz")
+
 # ─── yt_dlp logger ────────────────────────────────────────────
 ydl_logger = logging.getLogger("yt_dlp")
 ydl_handler = logging.StreamHandler()
@@ -326,45 +393,6 @@ class ReminderManager:
             return None, None
 
 
-class GuardianNewsAPI:
-    BASE_URL = "https://content.guardianapis.com/search"
-    def __init__(self, key=None):
-        self.key = key or os.getenv("GUARDIAN_KEY")
-        if not self.key:
-            raise ValueError("GUARDIAN_KEY missing")
-
-    @staticmethod
-    def _clean(raw):
-        return html.unescape(re.sub(r"<[^>]+>", "", raw)).strip()
-
-    def fetch_news(self, *, amount=10, keyword=None):
-        p = {
-            "api-key": self.key,
-            "show-fields": "trailText",
-            "order-by": "newest",
-            "page-size": min(max(amount, 1), 200)
-        }
-        if keyword:
-            p["q"] = keyword
-        r = requests.get(self.BASE_URL, params=p, timeout=10)
-        r.raise_for_status()
-        news = []
-        for it in r.json()["response"]["results"]:
-            raw_html = it.get("fields", {}).get("trailText", "")
-            preview_full = self._clean(raw_html)
-            # Truncate to 400 characters as before
-            if len(preview_full) > 400:
-                preview_full = preview_full[:400].rstrip() + "…"
-            news.append({
-                "title": it["webTitle"],
-                "url": it["webUrl"],
-                "preview": preview_full,
-                "date": datetime.fromisoformat(
-                    it["webPublicationDate"].replace("Z", "+00:00")
-                ).strftime("%Y-%m-%d")
-            })
-        return news
-
 class MainUI(BoxLayout):
     def show_error(self, msg):
         # On error, clear title/footer and place msg into preview (in red)
@@ -379,94 +407,223 @@ class AIWeatherApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._is_speaking = False
-        self._speak_stream = None
+        self._speak_token = None
+        self._ai_cancel = None
+        self._music_volume = None
 
     def build(self):
         self.reminder_manager = ReminderManager()
         self.news_api      = GuardianNewsAPI()
+        self.news_feed     = NewsFeed(self.news_api)
+        self.news_topics   = TopicBuffers(self.news_feed, store=NEWS_STORE, executor=EXECUTOR)
         self.current_city  = "London"
+        self._weather_city = None
+        self._weather_when = None
         self._news_keyword = None
         self._news_buffer  = deque()
-        self._recent_urls  = deque(maxlen=50)
+        self._headline_logged = False
         self._init_player()
+        AUDIO.set_ducker(self._duck_music)
         return MainUI()
 
     def on_start(self):
+        Window.bind(on_flip=self._on_first_frame)   # once the first frame is shown
         self.get_weather()
-        self.refresh_news()
+        if not self._restore_news():             # nothing saved: first fetch
+            self.refresh_news()
         self.update_today_reminder_summary()
         Clock.schedule_interval(self.get_weather, WEATHER_REFRESH_SEC)
+        Clock.schedule_interval(self.prefetch_weather, WEATHER_REFRESH_SEC)
+        self.prefetch_weather()
         Clock.schedule_interval(self.refresh_news, NEWS_REFRESH_SEC)
+        Clock.schedule_interval(self.prefetch_news, NEWS_REFRESH_SEC)
+        self.prefetch_news()
+        EXECUTOR.submit(TTS_CACHE.cleanup_orphans)
+        EXECUTOR.submit(LOCAL_STT.load)          # offline STT model, if present
+        EXECUTOR.submit(ANSWER_CACHE.load)       # sentence encoder
+        EXECUTOR.submit(load_city_list)          # OpenWeather city IDs, if downloaded
+
+    def _on_first_frame(self, *_):
+        Window.unbind(on_flip=self._on_first_frame)
+        logger.info("[BOOT] first frame after %.2f s (watsonx client %s)",
+                    perf_counter() - _BOOT_T0, "eager" if EAGER_CHATBOT else "lazy")
+        start_chatbot()                          # build it now, off the UI thread
 
     def on_stop(self):
+        logger.info("[TTS] cache stats: %s", TTS_CACHE.stats())
+        logger.info("[TTS] backend stats: %s", TTS_ROUTER.stats())
+        logger.info("[IAM] token stats: %s", IBM.stats())
+        logger.info("[AI] answer cache stats: %s", ANSWER_CACHE.stats())
+        logger.info("[HTTP] per-host stats: %s", HTTP.stats())
+        logger.info("[WEATHER] cache stats: %s", WEATHER.stats())
+        logger.info("[WEATHER] forecast cache stats: %s", FORECAST.stats())
+        logger.info("[NEWS] feed stats: %s", self.news_feed.stats())
+        logger.info("[NEWS] store stats: %s", NEWS_STORE.stats())
+        logger.info("[NEWS] topic buffer stats: %s", self.news_topics.stats())
         EXECUTOR.shutdown(wait=False)
 
     # ─── Weather ───────────────────────────────────────────────────────────────
-    def get_weather(self, city=None, *_):
+    def get_weather(self, city=None, *_, when=None):
+        """
+        Show the weather for *city*. With a B-time phrase (*when*, e.g.
+        "tomorrow morning") the answer comes from the cached forecast
+        timeline; the forecast is also kept warm on every timer tick.
+        """
         if not isinstance(city, str):
             city = None
         city = city or self.current_city or "London"
-        def task():
-            key = os.getenv("OPENWEATHER_KEY")
-            if not key:
-                Clock.schedule_once(lambda *_:
-                    self._upd_weather("✖", "OPENWEATHER_KEY missing")
-                )
+        self._weather_city, self._weather_when = city, when
+        forecast = FORECAST.get(city, on_update=partial(self._on_forecast, city, when)
+                                if when else None)
+        if when:
+            line = forecast_line(forecast, when)
+            if line:                     # answered from the timeline, no call
+                self._upd_weather(*line)
                 return
-            try:
-                r = requests.get(
-                    "https://api.openweathermap.org/data/2.5/weather",
-                    params=dict(q=city, appid=key, units="metric", lang="en"),
-                    timeout=8
-                )
-                r.raise_for_status()
-                d = r.json()
-                desc  = d["weather"][0]["main"]
-                temp  = d["main"]["temp"]
-                emoji = {
-                    "Clear": "☀️", "Clouds": "☁️", "Rain": "🌧️", "Snow": "❄️",
-                    "Thunderstorm": "⚡", "Drizzle": "🌦️",
-                    "Mist": "🌫️", "Haze": "🌫️", "Fog": "🌁"
-                }.get(desc, "🌈")
-                Clock.schedule_once(lambda *_:
-                    self._upd_weather(emoji, f"{city}: {desc}, {temp:.1f} °C")
-                )
-            except Exception:
-                Clock.schedule_once(lambda *_:
-                    self._upd_weather("✖", "API error")
-                )
+            if forecast is None:         # cold: the forecast refresh will answer
+                return
+        reading = WEATHER.get(city, on_update=partial(self._on_weather, city, when))
+        if reading:                      # fresh or stale: show it right away
+            self._upd_weather(*reading.summary())
+
+    def prefetch_weather(self, *_):
+        """Keep the cities users ask about most warm, so switching is instant."""
+        def task():
+            top = USAGE.top("location", WEATHER_PREFETCH_CITIES, intent="get_weather")
+            cities = list(dict.fromkeys(canonical_city(c.title()) for c in top))
+            started = WEATHER.prefetch(cities) + FORECAST.prefetch(cities)
+            if started:
+                logger.info("[WEATHER] prefetching %d readings for %s", started, cities)
         EXECUTOR.submit(task)
 
+    def _on_weather(self, city, when, reading, error):
+        """Background refresh finished (worker thread)."""
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        fixed = canonical_city(city, fuzzy=True) if status == 404 else city
+        if reading:
+            Clock.schedule_once(lambda *_: self._show_weather(city, when, *reading.summary()))
+        elif fixed != city:              # OpenWeather doesn't know it: a misheard name?
+            Clock.schedule_once(lambda *_: self._retry_weather(city, fixed, when))
+        elif WEATHER.peek(city) is None:  # nothing cached to fall back on
+            line = str(error) if isinstance(error, RuntimeError) else "API error"
+            Clock.schedule_once(lambda *_: self._show_weather(city, when, "✖", line))
+
+    def _on_forecast(self, city, when, reading, error):
+        """Forecast refresh for a time-sliced question finished (worker thread)."""
+        line = forecast_line(reading, when) if reading else None
+        if line:
+            Clock.schedule_once(lambda *_: self._show_weather(city, when, *line))
+        elif reading or FORECAST.peek(city) is None:
+            # "now"-like phrase, or no forecast at all: current conditions
+            Clock.schedule_once(lambda *_: self._weather_now(city, when))
+
+    def _retry_weather(self, city, fixed, when):
+        if (city, when) == (self._weather_city, self._weather_when):
+            self.current_city = fixed
+            self.get_weather(fixed, when=when)
+
+    def _weather_now(self, city, when):
+        if (city, when) == (self._weather_city, self._weather_when):
+            reading = WEATHER.get(city, on_update=partial(self._on_weather, city, when))
+            if reading:
+                self._upd_weather(*reading.summary())
+
+    def _show_weather(self, city, when, icon, line):
+        # the user may have asked about something else meanwhile
+        if (city, when) == (self._weather_city, self._weather_when):
+            self._upd_weather(icon, line)
+
     def _upd_weather(self, icon, line):
         self.root.ids.weather_icon.text = icon
         self.root.ids.weather_label.text = line
 
 # ─── News ──────────────────────────────────────────────────────────────────
     def refresh_news(self, *_):
+        if not self._news_buffer:                # warmed by prefetch_news?
+            self._news_buffer.extend(self.news_topics.take(self._news_keyword))
         if self._news_buffer:
             art = self._news_buffer.popleft()
-            self._recent_urls.append(art["url"])
             Clock.schedule_once(lambda *_: self._show_headline(art))
         else:
             EXECUTOR.submit(self._fill_buffer)
 
+    def switch_news(self, keyword):
+        """Show *keyword*'s headlines: from its warm buffer or the store if
+        possible, otherwise with a fresh fetch. What the old topic had not
+        shown yet is kept for switching back."""
+        self.news_topics.stash(self._news_keyword, self._news_buffer)
+        self._news_keyword = keyword
+        self._news_buffer.clear()
+        warm = self.news_topics.take(keyword)
+        if warm:
+            self._news_buffer.extend(warm)
+            self._show_headline(self._news_buffer.popleft())
+        elif not self._restore_news():
+            self.refresh_news()
+
+    def prefetch_news(self, *_):
+        """Keep small buffers for the topics users ask about most, so
+        "news about …" is answered from memory."""
+        def task():
+            topics = USAGE.top("topic", NEWS_PREFETCH_TOPICS, intent="get_news")
+            started = self.news_topics.warm(
+                t for t in topics if TopicBuffers.key(t) != TopicBuffers.key(self._news_keyword))
+            if started:
+                logger.info("[NEWS] warming %d topic buffers for %s", started, topics)
+        EXECUTOR.submit(task)
+
     def _fill_buffer(self):
+        keyword = self._news_keyword
         try:
-            items = self.news_api.fetch_news(amount=50, keyword=self._news_keyword)
-            fresh = [a for a in items if a["url"] not in self._recent_urls]
-            if not fresh:
-                self._recent_urls.clear()
-                fresh = items
-            self._news_buffer.extend(fresh)
+            # only articles this keyword has not shown yet (newest first);
+            # [] if another refill for it is already running – that one shows
+            items = self.news_feed.fetch_more(keyword)
         except (RequestException, ValueError) as e:
-            Clock.schedule_once(lambda *_:
-                self.root.show_error(f"Guardian API error: {e}")
-            )
+            saved = NEWS_STORE.get(keyword, offline=True)
+            if saved is None or keyword != self._news_keyword:
+                Clock.schedule_once(lambda *_:
+                    self.root.show_error(f"Guardian API error: {e}")
+                )
+                return
+            logger.info("[NEWS] offline (%s) – replaying %d saved headlines", e, len(saved[0]))
+            items = saved[0]
+        else:
+            NEWS_STORE.put(keyword, items)
+        if not items or keyword != self._news_keyword:   # topic changed meanwhile
             return
-        if self._news_buffer:
-            art = self._news_buffer.popleft()
-            self._recent_urls.append(art["url"])
-            Clock.schedule_once(lambda *_: self._show_headline(art))
+        self._news_buffer.extend(items)
+        art = self._news_buffer.popleft()
+        Clock.schedule_once(lambda *_: self._show_headline(art))
+
+    def _restore_news(self) -> bool:
+        """Show the saved headlines for the current keyword straight away and,
+        unless they are recent, fetch anything newer behind them. Headlines
+        the feed already delivered this session (e.g. before a topic switch)
+        are not replayed; False if none are left."""
+        keyword = self._news_keyword
+        saved = NEWS_STORE.get(keyword)
+        if saved is None:
+            return False
+        articles, fresh = saved
+        articles = self.news_feed.seed(keyword, articles)
+        if not articles:
+            return False
+        self._news_buffer.extend(articles)
+        self._show_headline(self._news_buffer.popleft())
+        if not fresh:
+            EXECUTOR.submit(self._top_up_news, keyword)
+        return True
+
+    def _top_up_news(self, keyword):
+        """Background refresh after a restore: newer articles go to the front."""
+        try:
+            items = self.news_feed.fetch_more(keyword)
+        except (RequestException, ValueError) as e:
+            logger.info("[NEWS] refresh after restore failed: %s", e)
+            return
+        NEWS_STORE.put(keyword, items)
+        if keyword == self._news_keyword:
+            self._news_buffer.extendleft(reversed(items))
 
     def _show_headline(self, art):
         """
@@ -481,6 +638,10 @@ class AIWeatherApp(App):
                 return text
             return " ".join(parts[:n]).rstrip(" .!?,;:") + "…"
 
+        if not self._headline_logged:
+            self._headline_logged = True
+            logger.info("[BOOT] first headline after %.2f s", perf_counter() - _BOOT_T0)
+
         lbl_title   = self.root.ids.news_title
         lbl_preview = self.root.ids.news_preview
         lbl_footer  = self.root.ids.news_footer
@@ -515,14 +676,19 @@ class AIWeatherApp(App):
 
         self.root.ids.chatbot_output.text = "Thinking…"
 
-        EXECUTOR.submit(lambda: get_response(query)).add_done_callback(
-            lambda fut: Clock.schedule_once(
+        def show(fut):
+            if fut.exception():
+                logger.warning("watsonx reply failed: %s", fut.exception())
+            reply = ERROR_REPLY if fut.exception() else fut.result()
+            Clock.schedule_once(
                 lambda *_: (
-                    setattr(self.root.ids.chatbot_output, "text", fut.result()),
-                    self._show_chatbot_popup(fut.result())           # still immediate
+                    setattr(self.root.ids.chatbot_output, "text", reply),
+                    self._show_chatbot_popup(reply)                  # still immediate
                 )
             )
-        )
+
+        # first-line reply: not Ask AI's paragraph, so it stays out of ANSWER_CACHE
+        EXECUTOR.submit(get_response, query, raise_errors=True).add_done_callback(show)
 
 
     def ask_ai_and_speak(self):
@@ -537,43 +703,195 @@ class AIWeatherApp(App):
 
         chatlog.info("Prompt : %s", prompt_raw)
 
-        prompt = f"Reply in one paragraph. {prompt_raw}"
-        self.root.ids.chatbot_output.text = "Thinking…"
+        # follow-ups ("and tomorrow?") need the history – and must not be
+        # answered from the cache, which only knows stand-alone questions
+        use_cache = not CHAT_MEMORY.is_follow_up(prompt_raw)
+        prompt, info = CHAT_MEMORY.build_prompt(prompt_raw)
+        chatlog.info("Prompt : ~%d tokens (%d turns verbatim, %d summarised, %d dropped)",
+                     info["tokens"], info["verbatim"], info["summarised"], info["dropped"])
+        # a reply written with history in the prompt may depend on it: it
+        # must not be served to the next person who asks the bare question
+        store = use_cache and not (info["verbatim"] or info["summarised"])
+        self.root.ids.chatbot_output.text = "Thinking…" if CHATBOT_READY.done() \
+                                            else "Starting AI…"
         self.root.ids.request_input.text = ""
 
-        def worker():
-            """Runs in the pool: get reply → build WAV → schedule playback."""
-            reply = get_response(prompt)
+        if not STREAM_LLM:
+            EXECUTOR.submit(self._reply_then_speak, prompt_raw, prompt, use_cache, store)
+            return
 
-            wav_path = Path(tempfile.gettempdir()) / f"chatbot_{uuid.uuid4().hex}.wav"
+        # a tap now stops generation as well as speech
+        self._is_speaking = True
+        self._speak_token = None
+        cancel = self._ai_cancel = Event()
+        t0 = perf_counter()
+
+        reply_done = Future()
+
+        def await_speech(pipe):
+            """Pool: wait for the first sentence's audio, then start playback."""
             try:
-                text_to_speech_ibm(reply, str(wav_path))   # may take a few seconds
+                # a cloud failure is recorded by the router (which then
+                # prefers local) and the reply is spoken locally instead
+                audio = TTS_ROUTER.speak_pipeline(pipe, reply_done.result)
             except Exception:
                 logger.exception("TTS failed")
-                Clock.schedule_once(
-                    lambda *_: setattr(self.root.ids.chatbot_output, "text", "TTS error")
-                )
+                Clock.schedule_once(lambda *_: self._finish_ai_reply("TTS error", cancel))
                 return
+            if audio is None:
+                return
+            if cancel.is_set() or (reply_done.done() and not reply_done.result()):
+                audio.close()                    # stopped, or nothing to say
+                return
+            Clock.schedule_once(lambda *_: self._begin_audio_playback(audio, cancel))
 
-            # Playback (and popup) must run on the UI thread
-            Clock.schedule_once(lambda *_: self._begin_audio_playback(reply, wav_path))
+        def worker():
+            """Pool: cached answer, or stream tokens → popup, sentences → TTS."""
+            cached = ANSWER_CACHE.lookup(prompt_raw) if use_cache else None
+            if cached:
+                chatlog.info("Reply  : %s  [cached]", cached)
+                CHAT_MEMORY.add(prompt_raw, cached)
+                Clock.schedule_once(partial(self._render_reply, cached, cancel))
+                self._speak_reply(cached, t0, cancel)
+                return
+            try:
+                start_chatbot().result()         # still initialising? wait here
+            except Exception:
+                logger.exception("watsonx client unavailable")
+                Clock.schedule_once(lambda *_: self._finish_ai_reply("AI unavailable", cancel))
+                return
 
-        EXECUTOR.submit(worker)
+            # the router picks this reply's voice once it is too long for the
+            # local engine's short-text rule. Cloud voice: feed sentences to
+            # the TTS pipeline while the LLM is still writing; otherwise (or
+            # if the reply stays short) speak the whole reply once complete
+            pipe, undecided, held = None, STREAM_TTS, []
 
+            splitter, reply, first, failed = SentenceSplitter(), "", None, False
+            try:
+                for delta in stream_response(prompt):
+                    if cancel.is_set():
+                        break
+                    reply += delta
+                    if first is None:
+                        first = perf_counter() - t0
+                    Clock.schedule_once(partial(self._render_reply, reply, cancel))
+                    if pipe or undecided:
+                        held += splitter.push(delta)
+                    if undecided and len(reply) > TTS_ROUTER.max_local_chars:
+                        undecided = False
+                        if TTS_ROUTER.choose(reply) is TTS_ROUTER.cloud:
+                            pipe = SpeechPipeline()
+                            EXECUTOR.submit(await_speech, pipe)
+                    if pipe:
+                        for sentence in held:
+                            pipe.feed(sentence)
+                        held.clear()
+            except Exception:
+                logger.exception("LLM streaming failed")
+                failed = True
+            finally:
+                reply_done.set_result(reply)
+                if pipe:
+                    for sentence in splitter.flush():
+                        pipe.feed(sentence)
+                    pipe.close()
+                    if cancel.is_set() or not reply:
+                        pipe.cancel()
+
+            reply = reply.strip()
+            chatlog.info("Reply  : %s", reply)
+            if first is not None:
+                chatlog.info("LLM    : first token after %.2f s, done after %.2f s",
+                             first, perf_counter() - t0)
+            if cancel.is_set():
+                return
+            if not reply:
+                Clock.schedule_once(lambda *_: self._finish_ai_reply("AI error", cancel))
+                return
+            if not failed:
+                CHAT_MEMORY.add(prompt_raw, reply)
+                if store:
+                    ANSWER_CACHE.store(prompt_raw, reply, perf_counter() - t0)
+            if not pipe:
+                self._speak_reply(reply, t0, cancel)
+
+        EXECUTOR.submit(worker)
 
-    def _begin_audio_playback(self, reply_text, wav_path: Path):
-        self._show_chatbot_popup(reply_text)     # appears *now*, when playback starts
+    def _reply_then_speak(self, question, prompt, use_cache, store):
+        """Pool: blocking path – whole reply first, then synthesis."""
+        try:
+            reply = cached_response(question, prompt, use_cache=use_cache, store=store)
+        except ChatbotError as e:
+            logger.warning("watsonx reply failed: %s", e)
+            reply = ERROR_REPLY
+        else:
+            CHAT_MEMORY.add(question, reply)
         self._is_speaking = True
-        self.root.ids.chatbot_output.font_name = "FA"
-        self.root.ids.chatbot_output.text = u"\uf04c"      # pause icon
-        threading.Thread(
-            target=self._play_audio, args=(wav_path,), daemon=True
-        ).start()
+        self._speak_token = None
+        cancel = self._ai_cancel = Event()
+        Clock.schedule_once(partial(self._render_reply, reply, cancel))
+        self._speak_reply(reply, perf_counter(), cancel)
+
+    def _speak_reply(self, reply, t0, cancel):
+        """Pool: synthesise a complete reply and schedule its playback."""
+        try:
+            if STREAM_TTS:
+                # local engine for short replies / slow cloud, otherwise
+                # Watson sentence pipeline; returns once audio starts
+                audio = TTS_ROUTER.speak(reply)        # logs its own TTFA
+            else:
+                audio = synthesize_cached(reply)       # may take a few seconds
+                chatlog.info("TTS    : first audio after %.2f s", perf_counter() - t0)
+        except Exception:
+            logger.exception("TTS failed")
+            Clock.schedule_once(lambda *_: self._finish_ai_reply("TTS error", cancel))
+            return
+
+        # Playback must run on the UI thread
+        Clock.schedule_once(lambda *_: self._begin_audio_playback(audio, cancel))
+
+    def _render_reply(self, text, cancel, *_):
+        """UI thread: show the reply so far (opens the popup on first call)."""
+        if cancel.is_set():
+            return
+        label = getattr(self, "_chatbot_label", None)
+        if getattr(self, "_chatbot_popup", None) and label is not None:
+            label.text = text
+        else:
+            self._show_chatbot_popup(text)
+            self.root.ids.chatbot_output.font_name = "FA"
+            self.root.ids.chatbot_output.text = u"\uf04c"      # pause icon
+
+    def _finish_ai_reply(self, text, cancel):
+        """UI thread: nothing to play – reset the button."""
+        if cancel is not self._ai_cancel or cancel.is_set():
+            return
+        self._is_speaking = False
+        self.root.ids.chatbot_output.font_name = "UI"
+        self.root.ids.chatbot_output.text = text
+
+    def _begin_audio_playback(self, audio, cancel):
+        if cancel.is_set():
+            if isinstance(audio, SpeechStream):
+                audio.close()
+            return
+        try:
+            speech = audio if isinstance(audio, SpeechStream) else open_speech(audio)
+        except Exception:
+            logger.exception("Playback failed")
+            self._speak_token = None
+            self._on_speech_done(None)
+            return
+        # AI replies pre-empt news reading and anything else in the queue
+        self._speak_token = AUDIO.submit(speech, Priority.AI_REPLY,
+                                         on_done=self._on_speech_done)
 
     def _show_chatbot_popup(self, reply_text):
         # close previous popup (if user asked again quickly)
-        if getattr(self, "_chatbot_popup", None):
-            self._chatbot_popup.dismiss()
+        old, self._chatbot_popup = getattr(self, "_chatbot_popup", None), None
+        if old:
+            old.dismiss()
 
         label = Label(
             text=reply_text,
@@ -601,9 +919,12 @@ class AIWeatherApp(App):
         popup.bind(on_dismiss=self._on_popup_closed)
 
         self._chatbot_popup = popup
+        self._chatbot_label = label
         popup.open()
 
-    def _on_popup_closed(self, *_):
+    def _on_popup_closed(self, popup, *_):
+        if popup is not self._chatbot_popup:
+            return                               # replaced by a newer reply
         self._chatbot_popup = None
         Clock.schedule_once(lambda *_: self._stop_chatbot_speech())  # stop safely
 
@@ -611,45 +932,24 @@ class AIWeatherApp(App):
     def _stop_chatbot_speech(self):
         if not self._is_speaking:
             return
-        self._is_speaking = False                # playback thread will exit
+        self._is_speaking = False
+        if self._ai_cancel:
+            self._ai_cancel.set()                # stop generation / synthesis
+        if self._speak_token:
+            self._speak_token.cancel("stopped by user")
         self.root.ids.chatbot_output.font_name = "UI"
         self.root.ids.chatbot_output.text = "Ask AI"
 
 
-    def _play_audio(self, wav_path: Path):
-        try:
-            wf = wave.open(str(wav_path), "rb")
-            pa = pyaudio.PyAudio()
-            stream = pa.open(
-                format  = pa.get_format_from_width(wf.getsampwidth()),
-                channels= wf.getnchannels(),
-                rate    = wf.getframerate(),
-                output  = True,
-            )
-            self._speak_stream = stream
-
-            data = wf.readframes(1024)
-            while data and self._is_speaking:
-                stream.write(data)
-                data = wf.readframes(1024)
-        finally:
-            # Always clean up
-            if self._speak_stream:
-                self._speak_stream.stop_stream()
-                self._speak_stream.close()
-                self._speak_stream = None
-            try:
-                pa.terminate()
-            except Exception:
-                pass
-
+    def _on_speech_done(self, token):
+        """Audio thread: the reply finished, failed or was cancelled."""
+        def _ui(*_):
+            if token is not self._speak_token:
+                return                           # an older, superseded reply
             self._is_speaking = False
-            Clock.schedule_once(
-                lambda *_: (
-                    setattr(self.root.ids.chatbot_output, "font_name", "UI"),
-                    setattr(self.root.ids.chatbot_output, "text", "Ask AI")
-                )
-            )
+            self.root.ids.chatbot_output.font_name = "UI"
+            self.root.ids.chatbot_output.text = "Ask AI"
+        Clock.schedule_once(_ui)
 
  # ── Speech capture ───────────────────────────────────────────
     def start_record(self):
@@ -666,6 +966,7 @@ class AIWeatherApp(App):
         self.root.ids.btn_request.text = u"\U0001F399"
         self.root.ids.btn_request.font_name = "Emoji"
         logger.info("[MIC] Recording started…")
+        EXECUTOR.submit(prewarm_network)     # token + TLS ready on release
         self._listen_evt = Clock.schedule_once(self._show_listen_icon, 2)
         self._rec_thr = threading.Thread(
             target=record_to_wav,
@@ -688,7 +989,7 @@ class AIWeatherApp(App):
             return
         self._reset_mic_icon()
         logger.info("[STT] Submitting audio file: %s", self.tmp_rec)
-        EXECUTOR.submit(transcribe_audio_ibm, str(self.tmp_rec))\
+        EXECUTOR.submit(transcribe, str(self.tmp_rec))\
                 .add_done_callback(self._after_stt)
 
     def _reset_mic_icon(self):
@@ -724,13 +1025,21 @@ class AIWeatherApp(App):
         spoken  = f"{title}. {preview}".strip("— ").strip()
         if not spoken:
             return
-        out = Path(tempfile.gettempdir()) / f"news_{uuid.uuid4().hex}.wav"
-        def _do_tts():
-            text_to_speech_ibm(spoken, str(out))
-            return out
-        EXECUTOR.submit(_do_tts)\
-                .add_done_callback(lambda fut: play_wav(str(fut.result())))
-        
+        if STREAM_TTS:
+            job = lambda: AUDIO.submit(TTS_ROUTER.speak(spoken), Priority.NEWS)
+        else:
+            job = lambda: AUDIO.submit(open_speech(synthesize_cached(spoken)),
+                                       Priority.NEWS)
+        EXECUTOR.submit(job).add_done_callback(self._after_news_speech)
+
+    def _after_news_speech(self, fut):
+        try:
+            fut.result()
+        except Exception as e:
+            logger.exception("News read-aloud failed")
+            msg = f"TTS error: {e}"
+            Clock.schedule_once(lambda *_: self.root.show_error(msg))
+
     # ─── NLU routing ────────────────────────────────────────────────────────────
     def process_request(self, *_):
         t = self.root.ids.request_input.text.strip()
@@ -834,15 +1143,13 @@ class AIWeatherApp(App):
             # ── Weather ────────────────────────────────────────────────────
             if intent == "get_weather":
                 if loc:
-                    self.current_city = loc
-                self.get_weather()
+                    self.current_city = canonical_city(loc)
+                self.get_weather(when=time_str or None)
                 handled = True
 
             # ── News ───────────────────────────────────────────────────────
             elif intent == "get_news":
-                self._news_keyword = topic or words or None
-                self._news_buffer.clear()
-                self.refresh_news()
+                self.switch_news(topic or words or None)
                 handled = True
 
             # ── Music ──────────────────────────────────────────────────────
@@ -917,6 +1224,20 @@ class AIWeatherApp(App):
         self._vlc   = vlc.Instance("--no-xlib", "--quiet", "--novideo")
         self.player = self._vlc.media_player_new()
 
+    def _duck_music(self, on: bool):
+        """Lower the music while the kiosk speaks; restore it afterwards."""
+        if not self.player:
+            return
+        if on:
+            vol = self.player.audio_get_volume()
+            if vol is None or vol < 0:           # no audio output yet
+                return
+            self._music_volume = vol
+            self.player.audio_set_volume(int(vol * DUCK_LEVEL))
+        elif self._music_volume is not None:
+            self.player.audio_set_volume(self._music_volume)
+            self._music_volume = None
+
     def get_music(self, query=None, *_):
         if not query:
             self._music_error("No music keywords found")
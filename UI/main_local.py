@@ -19,8 +19,8 @@ import wave
 import uuid
 from time import monotonic
 import tempfile
-import requests
 from requests.exceptions import RequestException
+from http_client import HTTP
 import yt_dlp
 try:
     import vlc
@@ -316,7 +316,7 @@ class GuardianNewsAPI:
         }
         if keyword:
             p["q"] = keyword
-        r = requests.get(self.BASE_URL, params=p, timeout=10)
+        r = HTTP.get(self.BASE_URL, params=p, timeout=10)
         r.raise_for_status()
         news = []
         for it in r.json()["response"]["results"]:
@@ -384,7 +384,7 @@ class AIWeatherApp(App):
                 )
                 return
             try:
-                r = requests.get(
+                r = HTTP.get(
                     "https://api.openweathermap.org/data/2.5/weather",
                     params=dict(q=city, appid=key, units="metric", lang="en"),
                     timeout=8
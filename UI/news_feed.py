@@ -0,0 +1,561 @@
+"""Guardian headlines, fetched incrementally.
+
+The news panel used to re-download the 50 newest articles whenever its
+buffer ran dry and then drop the ones it had already shown – a linear
+scan of a deque, and a full 50-item payload for a handful of new stories.
+NewsFeed keeps a cursor per keyword instead:
+
+* the newest ``webPublicationDate`` seen – refills first ask only for
+  articles published since then, a small page at a time
+* a position in the back catalogue – refills are topped up from there,
+  one page further back at a time (it shifts as new articles arrive)
+* a bounded set of URL fingerprints for O(1) de-duplication
+
+A refill can be capped (``limit``) – articles past the cap are not marked
+as seen, so they come in a later refill. Articles a caller got but will
+not show after all (e.g. evicted from a buffer) can be handed back with
+``put_back()``; the next refill returns them first, without a call.
+
+A refill may take several calls; it works on a staged copy of the cursor
+that is only committed once all of them have succeeded, so a failed call
+(network error, RateLimited) never marks articles as shown that the
+panel never got.
+
+Refills are single-flight per keyword (a timer tick and a button press at
+the same moment share one fetch) and every API call takes a token from
+GuardianNewsAPI's rate limiter, which mirrors the developer-key quota.
+API calls, bytes downloaded, coalesced and throttled calls are counted
+(see stats()).
+
+    feed = NewsFeed(GuardianNewsAPI())
+    articles = feed.fetch_more("rugby")     # only ones not shown before
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from requests import RequestException
+
+from http_client import HTTP
+
+
+class RateLimited(RequestException):
+    """The local quota has no token left for another Guardian call."""
+
+
+class TokenBucket:
+    """*rate* tokens per second, up to *capacity* saved up for bursts."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate, self.capacity = rate, capacity
+        self._tokens  = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = self.rejected = 0
+        self.waited_sec = 0.0
+
+    def acquire(self, max_wait: float = 0.0) -> bool:
+        """Take one token, sleeping up to *max_wait* s for it; False if that
+        is not enough."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if wait > max_wait:
+                self.rejected += 1
+                return False
+            self._tokens -= 1                  # may go negative: reserved
+            if wait:
+                self.throttled += 1
+                self.waited_sec += wait
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"throttled": self.throttled, "rejected": self.rejected,
+                    "waited_sec": round(self.waited_sec, 2)}
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution (Go's singleflight)."""
+
+    def __init__(self):
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run *fn* unless a call for *key* is already running, in which case
+        wait for that one. Returns (result, shared) – *shared* is True for
+        the callers that joined. Exceptions reach every caller."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+            else:
+                self.coalesced += 1
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"], True
+        try:
+            call["result"] = fn()
+            return call["result"], False
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class GuardianNewsAPI:
+    BASE_URL = "https://content.guardianapis.com/search"
+
+    # developer keys: 1 call/s and 500 calls/day
+    PER_SECOND, PER_DAY = 1.0, 500
+
+    def __init__(self, key=None, http=HTTP, *, max_wait: float = 3.0):
+        self.key = key or os.getenv("GUARDIAN_KEY")
+        if not self.key:
+            raise ValueError("GUARDIAN_KEY missing")
+        self.http  = http
+        self.calls = 0
+        self.bytes = 0
+        self.max_wait = max_wait
+        self.limits = (TokenBucket(self.PER_SECOND, 2),
+                       TokenBucket(self.PER_DAY / 86400, self.PER_DAY / 10))
+
+    @staticmethod
+    def _clean(raw):
+        return html.unescape(re.sub(r"<[^>]+>", "", raw)).strip()
+
+    def search(self, keyword=None, **params) -> dict:
+        """One /search call; returns the ``response`` object (results, pages …)."""
+        p = {"api-key": self.key, "show-fields": "trailText", "order-by": "newest"}
+        p.update({k.replace("_", "-"): v for k, v in params.items()})
+        if keyword:
+            p["q"] = keyword
+        for bucket in self.limits:
+            if not bucket.acquire(self.max_wait):
+                raise RateLimited("Guardian quota reached – try again shortly")
+        r = self.http.get(self.BASE_URL, params=p, timeout=10)
+        self.calls += 1
+        self.bytes += len(r.content)
+        r.raise_for_status()
+        return r.json()["response"]
+
+    def article(self, it) -> dict:
+        """A search result as the news panel shows it."""
+        preview_full = self._clean(it.get("fields", {}).get("trailText", ""))
+        # Truncate to 400 characters as before
+        if len(preview_full) > 400:
+            preview_full = preview_full[:400].rstrip() + "…"
+        return {
+            "title": it["webTitle"],
+            "url": it["webUrl"],
+            "preview": preview_full,
+            "date": datetime.fromisoformat(
+                it["webPublicationDate"].replace("Z", "+00:00")
+            ).strftime("%Y-%m-%d"),
+            "published": it["webPublicationDate"],
+        }
+
+    def fetch_news(self, *, amount=10, keyword=None):
+        resp = self.search(keyword, page_size=min(max(amount, 1), 200))
+        return [self.article(it) for it in resp["results"]]
+
+
+class SeenSet:
+    """Bounded set of URL fingerprints (64-bit BLAKE2b); oldest forgotten first."""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._order: deque[int] = deque()
+        self._set: set[int] = set()
+
+    @staticmethod
+    def _fp(url: str) -> int:
+        return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "big")
+
+    def __contains__(self, url: str) -> bool:
+        return self._fp(url) in self._set
+
+    def __len__(self) -> int:
+        return len(self._set)
+
+    def add(self, url: str) -> bool:
+        """Remember *url*; False if it was already there."""
+        fp = self._fp(url)
+        if fp in self._set:
+            return False
+        self._set.add(fp)
+        self._order.append(fp)
+        if len(self._order) > self.capacity:
+            self._set.discard(self._order.popleft())
+        return True
+
+    def clear(self) -> None:
+        self._set.clear()
+        self._order.clear()
+
+
+class _StagedSeen:
+    """A SeenSet as one refill sees it: additions (and a clear) are kept
+    aside until commit()."""
+
+    def __init__(self, base: SeenSet):
+        self.base = base
+        self.added: dict[str, None] = {}      # insertion-ordered
+        self.cleared = False
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.added or (not self.cleared and url in self.base)
+
+    def add(self, url: str) -> bool:
+        if url in self:
+            return False
+        self.added[url] = None
+        return True
+
+    def clear(self) -> None:
+        self.cleared = True
+        self.added.clear()
+
+    def commit(self) -> None:
+        if self.cleared:
+            self.base.clear()
+        for url in self.added:
+            self.base.add(url)
+
+
+class _Cursor:
+    __slots__ = ("newest", "offset", "seen", "returned")
+
+    def __init__(self, seen_capacity: int):
+        self.newest: str | None = None        # newest webPublicationDate seen
+        self.offset = 0                       # back catalogue read up to here
+        self.seen = SeenSet(seen_capacity)
+        self.returned: list[dict] = []        # put_back(): delivered, not shown
+
+    def staged(self) -> _Cursor:
+        """A copy to refill with; nothing changes here until commit()."""
+        work = _Cursor.__new__(_Cursor)
+        work.newest, work.offset, work.seen = self.newest, self.offset, _StagedSeen(self.seen)
+        work.returned = []
+        return work
+
+    def commit(self, work: _Cursor) -> None:
+        """Apply *work* (lock held). Unless it started over, the position only
+        moves forward, so a seed() committed meanwhile is not undone."""
+        if work.seen.cleared:
+            self.newest, self.offset = work.newest, work.offset
+        else:
+            self.newest = max(filter(None, (self.newest, work.newest)), default=None)
+            self.offset = max(self.offset, work.offset)
+        work.seen.commit()
+
+
+class NewsFeed:
+    """Per-keyword cursors over the Guardian search API."""
+
+    def __init__(self, api: GuardianNewsAPI, *, batch: int = 30, page_size: int = 10,
+                 backfill_size: int = 20, max_pages: int = 25,
+                 seen_per_keyword: int = 1000, max_keywords: int = 16):
+        self.api = api
+        self.batch         = batch            # top a refill up to this many
+        self.page_size     = page_size        # "anything new?" pages
+        self.backfill_size = backfill_size    # first fetch / back-catalogue pages
+        self.max_pages     = max_pages
+        self.seen_per_keyword = seen_per_keyword
+        self.max_keywords  = max_keywords
+        self._depth = max_pages * backfill_size   # how far back we are willing to go
+        self._cursors: OrderedDict[str, _Cursor] = OrderedDict()
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._stats = {"refills": 0, "articles": 0, "restarts": 0}
+
+    # ── public API ────────────────────────────────────────────────────
+    def fetch_more(self, keyword: str | None = None, *, limit: int | None = None) -> list[dict]:
+        """Articles for *keyword* that have not been returned before: any
+        put back, then newer ones, topped up to *batch* (or *limit*, if
+        smaller) from the next pages back. With a *limit* at most that many
+        are returned and marked as seen. When the back catalogue is
+        exhausted the keyword starts over (old articles repeat).
+
+        Single-flight: a caller that arrives while a refill for the same
+        keyword is running waits for it and gets [] – the articles go to
+        the caller that started it, so nothing is buffered twice."""
+        key = (keyword or "").casefold().strip()
+        fresh, shared = self._flight.do(key, lambda: self._fetch_more(keyword, limit))
+        return [] if shared else fresh
+
+    def put_back(self, keyword: str | None, articles) -> None:
+        """Hand back articles fetch_more delivered but that were never shown:
+        the next refill for *keyword* returns them again (before anything
+        new, without an API call) instead of their being lost."""
+        articles = list(articles)
+        if articles:
+            cur = self._cursor(keyword)
+            with self._lock:
+                cur.returned += articles
+
+    def seed(self, keyword: str | None, articles: list[dict]) -> list[dict]:
+        """Mark *articles* (e.g. restored from disk) as already delivered, so
+        the next refill only brings what is newer or further back. Returns
+        those that had not been delivered before (all of them at boot)."""
+        cur = self._cursor(keyword)
+        new = []
+        with self._lock:
+            work = cur.staged()
+            for a in articles:
+                if work.seen.add(a["url"]):
+                    new.append(a)
+                published = a.get("published")
+                if published and (work.newest is None or published > work.newest):
+                    work.newest = published
+            work.offset = max(work.offset, len(articles))
+            cur.commit(work)
+        return new
+
+    def stats(self) -> dict:
+        hours = max((time.monotonic() - self._started) / 3600, 1 / 60)
+        s = dict(self._stats)
+        second, day = self.api.limits
+        return {"api_calls": self.api.calls, "bytes": self.api.bytes,
+                "api_calls_per_hour": round(self.api.calls / hours, 1),
+                "kb_per_hour": round(self.api.bytes / 1024 / hours, 1),
+                "refills": s["refills"], "articles": s["articles"],
+                "restarts": s["restarts"], "keywords": len(self._cursors),
+                "coalesced": self._flight.coalesced,
+                "throttled": second.throttled + day.throttled,
+                "rejected": second.rejected + day.rejected,
+                "throttle_wait_sec": round(second.waited_sec + day.waited_sec, 2)}
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _fetch_more(self, keyword, limit: int | None) -> list[dict]:
+        target = self.batch if limit is None else min(limit, self.batch)
+        base = self._cursor(keyword)
+        with self._lock:
+            back = base.returned[:target]
+        fresh = list(back)
+
+        def room():                           # how many more may be taken
+            return None if limit is None else target - len(fresh)
+
+        cur = base.staged()                   # a failed call leaves base as it was
+        if len(fresh) < target:
+            fresh += self._newer(keyword, cur, room()) if cur.newest \
+                else self._first(keyword, cur, room())
+        while len(fresh) < target and cur.offset < self._depth:
+            fresh += self._older(keyword, cur, room())
+        if not fresh and cur.offset >= self._depth:
+            self._stats["restarts"] += 1
+            cur.seen.clear()
+            cur.newest, cur.offset = None, 0
+            fresh = self._first(keyword, cur, room())
+        with self._lock:
+            base.commit(cur)
+            del base.returned[:len(back)]
+        self._stats["refills"] += 1
+        self._stats["articles"] += len(fresh)
+        return fresh
+
+    def _cursor(self, keyword) -> _Cursor:
+        key = (keyword or "").casefold().strip()
+        with self._lock:
+            cur = self._cursors.get(key)
+            if cur is None:
+                cur = self._cursors[key] = _Cursor(self.seen_per_keyword)
+                if len(self._cursors) > self.max_keywords:
+                    self._cursors.popitem(last=False)
+            self._cursors.move_to_end(key)
+            return cur
+
+    def _take(self, cur: _Cursor, results, room: int | None = None) -> tuple[list[dict], int]:
+        """Unseen articles from *results*, at most *room* of them, and how
+        many results were gone through – the rest are left unseen."""
+        fresh = []
+        for n, it in enumerate(results):
+            if room is not None and len(fresh) >= room:
+                return fresh, n
+            if cur.seen.add(it["webUrl"]):
+                fresh.append(self.api.article(it))
+            if cur.newest is None or it["webPublicationDate"] > cur.newest:
+                cur.newest = it["webPublicationDate"]
+        return fresh, len(results)
+
+    def _first(self, keyword, cur: _Cursor, room: int | None) -> list[dict]:
+        resp = self.api.search(keyword, page_size=self.backfill_size)
+        fresh, n = self._take(cur, resp["results"], room)
+        if n < len(resp["results"]):
+            cur.offset = n                        # the rest of the page next time
+        else:
+            cur.offset = self.backfill_size if resp.get("pages", 1) > 1 else self._depth
+        return fresh
+
+    def _newer(self, keyword, cur: _Cursor, room: int | None) -> list[dict]:
+        """Everything published since cur.newest, a small page at a time."""
+        since, fresh = cur.newest, []
+        for page in range(1, self.max_pages + 1):
+            # from-date has day granularity; the seen-set drops the overlap
+            resp = self.api.search(keyword, from_date=since[:10],
+                                   page_size=self.page_size, page=page)
+            results = resp["results"]
+            new = [it for it in results if it["webPublicationDate"] > since]
+            got, n = self._take(cur, new, None if room is None else room - len(fresh))
+            fresh += got
+            last = page >= resp.get("pages", 1) or len(new) < len(results)
+            if n < len(new) or (not last and room is not None and len(fresh) >= room):
+                cur.newest = since                # capped: ask from here again next time
+                break
+            if last:
+                break
+        # everything older moved down the result list by that many places
+        cur.offset += len(fresh)
+        return fresh
+
+    def _older(self, keyword, cur: _Cursor, room: int | None) -> list[dict]:
+        """The back-catalogue page holding the next unread article."""
+        page = cur.offset // self.backfill_size + 1
+        resp = self.api.search(keyword, page_size=self.backfill_size, page=page)
+        fresh, n = self._take(cur, resp["results"], room)
+        if n < len(resp["results"]):
+            cur.offset = (page - 1) * self.backfill_size + n
+        elif page >= resp.get("pages", 1):
+            cur.offset = self._depth              # nothing further back
+        else:
+            cur.offset = page * self.backfill_size
+        return fresh
+
+
+# ─── CLI: a day of news panel refills, old strategy vs. NewsFeed ────
+if __name__ == "__main__":
+    import json
+
+    HOURS, SHOW_EVERY, PUBLISH_EVERY = 24, 300, 360     # seconds (PUBLISH_EVERY varies)
+    clock = [0.0]
+
+    class FakeGuardian:
+        """In-memory /search: one new article every PUBLISH_EVERY seconds."""
+
+        def __init__(self, backlog=400):
+            self.first = -backlog
+
+        def _items(self):
+            newest = int(clock[0] // PUBLISH_EVERY)
+            return [{"id": f"world/{i}", "type": "article", "sectionId": "world",
+                     "sectionName": "World news", "pillarName": "News",
+                     "webPublicationDate": datetime.utcfromtimestamp(
+                         1_700_000_000 + i * PUBLISH_EVERY).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                     "webTitle": f"Headline number {i}",
+                     "webUrl": f"https://www.theguardian.com/world/{i}",
+                     "apiUrl": f"https://content.guardianapis.com/world/{i}",
+                     "fields": {"trailText": "<p>" + "A short standfirst. " * 10 + "</p>"},
+                     "isHosted": False, "pillarId": "pillar/news"}
+                    for i in range(newest, self.first - 1, -1)]
+
+        def get(self, url, params, timeout):
+            items = self._items()
+            if "from-date" in params:
+                items = [it for it in items
+                         if it["webPublicationDate"][:10] >= params["from-date"]]
+            size, page = params.get("page-size", 10), params.get("page", 1)
+            body = json.dumps({"response": {
+                "status": "ok", "total": len(items), "pageSize": size, "currentPage": page,
+                "pages": max(1, -(-len(items) // size)), "orderBy": "newest",
+                "results": items[(page - 1) * size: page * size]}}).encode()
+
+            class Resp:
+                content = body
+                def raise_for_status(self): pass
+                def json(self): return json.loads(body)
+            return Resp()
+
+    def run(strategy):
+        clock[0] = 0.0
+        api = GuardianNewsAPI("test", http=FakeGuardian())
+        buffer, shown = deque(), set()
+        recent = deque(maxlen=50)                     # the old de-dupe
+        feed = NewsFeed(api)
+        repeats = 0
+        while clock[0] < HOURS * 3600:
+            if not buffer:
+                if strategy == "old":
+                    items = api.fetch_news(amount=50)
+                    fresh = [a for a in items if a["url"] not in recent]
+                    if not fresh:
+                        recent.clear()
+                        fresh = items
+                    buffer.extend(fresh)
+                else:
+                    buffer.extend(feed.fetch_more(None))
+            if buffer:
+                art = buffer.popleft()
+                recent.append(art["url"])
+                repeats += art["url"] in shown
+                shown.add(art["url"])
+            clock[0] += SHOW_EVERY
+        return api.calls / HOURS, api.bytes / 1024 / HOURS, repeats
+
+    print(f"{HOURS} h, one headline every {SHOW_EVERY // 60} min")
+    for PUBLISH_EVERY, label in ((360, "busy feed"), (2700, "quiet topic")):
+        print(f"{label}: a new article every {PUBLISH_EVERY // 60} min")
+        for name in ("old", "incremental"):
+            calls, kb, repeats = run(name)
+            print(f"  {name:12}: {calls:5.1f} API calls/h  {kb:7.1f} KB/h  {repeats:3d} repeats")
+
+    # timer tick, button press and a voice command all refill at once
+    class SlowGuardian(FakeGuardian):
+        def get(self, url, params, timeout):
+            time.sleep(0.3)
+            return super().get(url, params, timeout)
+
+    feed = NewsFeed(GuardianNewsAPI("test", http=SlowGuardian()))
+    threads = [threading.Thread(target=feed.fetch_more) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    s = feed.stats()
+    print(f"3 simultaneous refills: {s['api_calls']} API calls, {s['coalesced']} coalesced, "
+          f"{s['throttled']} throttled ({s['throttle_wait_sec']} s waited)")
+    for _ in range(4):                                    # button mashing
+        feed.fetch_more("rugby")
+    s = feed.stats()
+    print(f"then 4 quick refills  : {s['api_calls']} API calls, {s['throttled']} throttled "
+          f"({s['throttle_wait_sec']} s waited), {s['rejected']} rejected")
+
+    # a call failing half-way through a refill must not lose its articles
+    class FlakyGuardian(FakeGuardian):
+        calls = 0
+
+        def get(self, url, params, timeout):
+            FlakyGuardian.calls += 1
+            if FlakyGuardian.calls == 2:
+                raise RequestException("connection reset")
+            return super().get(url, params, timeout)
+
+    feed = NewsFeed(GuardianNewsAPI("test", http=FlakyGuardian()))
+    try:
+        feed.fetch_more()
+    except RequestException as e:
+        print(f"refill failed on its 2nd call ({e}); ", end="")
+    first = feed.fetch_more()[0]["title"]
+    print(f"the retry starts at {first!r} (the newest)")
@@ -0,0 +1,115 @@
+"""On-disk copy of the news panel's articles, per keyword.
+
+At boot the panel used to stay empty until the first Guardian call came
+back, and without a network it only showed an error. NewsStore keeps the
+last *per_keyword* cleaned articles (title, url, preview, date) for each
+keyword in one gzip'd JSON file, so the panel can
+
+* show a headline the moment the UI is up, refreshing behind it
+* keep cycling through recent headlines while the network is down
+
+Entries younger than *ttl* count as fresh (no refresh needed at boot);
+older than *max_age* they are not shown at all, unless offline.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+log = logging.getLogger("news_store")
+
+FIELDS = ("title", "url", "preview", "date", "published")
+
+
+class NewsStore:
+    """Newest-first article lists per keyword, persisted atomically."""
+
+    def __init__(self, path: str | os.PathLike, *, ttl: float = 1800.0,
+                 max_age: float = 2 * 86400, per_keyword: int = 50, max_keywords: int = 16):
+        self.path = Path(path).expanduser()
+        self.ttl, self.max_age = ttl, max_age
+        self.per_keyword, self.max_keywords = per_keyword, max_keywords
+        self._entries: dict[str, dict] = {}     # key → {"saved_at", "articles"}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "offline_serves": 0, "writes": 0}
+        self._load()
+
+    @staticmethod
+    def key(keyword: str | None) -> str:
+        return (keyword or "").casefold().strip()
+
+    # ── public API ────────────────────────────────────────────────────
+    def get(self, keyword: str | None, *, offline: bool = False) -> tuple[list[dict], bool] | None:
+        """(articles, fresh) for *keyword*, or None. *offline* ignores max_age:
+        old headlines beat an error message."""
+        with self._lock:
+            entry = self._entries.get(self.key(keyword))
+            age = time.time() - entry["saved_at"] if entry else None
+            if entry is None or not entry["articles"] or (age > self.max_age and not offline):
+                self._stats["misses"] += 1
+                return None
+            self._stats["offline_serves" if offline else "hits"] += 1
+            return list(entry["articles"]), age < self.ttl
+
+    def put(self, keyword: str | None, articles: list[dict]) -> None:
+        """Merge newly fetched *articles* (newest first) in front and save."""
+        if not articles:
+            return
+        key = self.key(keyword)
+        with self._lock:
+            old = self._entries.pop(key, {"articles": []})["articles"]
+            urls = {a["url"] for a in articles}
+            merged = [{f: a[f] for f in FIELDS if f in a} for a in articles]
+            merged += [a for a in old if a["url"] not in urls]
+            merged.sort(key=lambda a: a.get("published", a["date"]), reverse=True)
+            self._entries[key] = {"saved_at": time.time(),
+                                  "articles": merged[:self.per_keyword]}
+            while len(self._entries) > self.max_keywords:      # oldest written first
+                del self._entries[next(iter(self._entries))]
+            self._stats["writes"] += 1
+        self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, keywords=len(self._entries),
+                        articles=sum(len(e["articles"]) for e in self._entries.values()))
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+                self._entries = json.load(fh)
+        except (OSError, ValueError) as e:
+            log.warning("[NEWS] ignoring unreadable store %s: %s", self.path, e)
+
+    def _save(self) -> None:
+        """Write the whole store atomically (temp file + os.replace); the
+        last writer always serialises the latest state."""
+        with self._save_lock:
+            with self._lock:
+                body = json.dumps(self._entries, ensure_ascii=False, separators=(",", ":"))
+            self._write(body)
+
+    def _write(self, body: str) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as fh:
+                    fh.write(body.encode("utf-8"))
+                os.replace(tmp, self.path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            log.warning("[NEWS] could not save store: %s", e)
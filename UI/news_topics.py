@@ -0,0 +1,225 @@
+"""Warm headline buffers for the topics users ask about most.
+
+"news about rugby" used to clear the panel's buffer and wait for a cold
+Guardian fetch. TopicBuffers keeps a few unshown articles in memory for
+each of the user's favourite topics (the most-logged ``topic`` slots),
+so a topic switch is served straight from memory:
+
+* ``warm(topics)`` (timer) tops up, in the background, every topic whose
+  buffer is running low or has not been refreshed for *max_age* – newer
+  articles go in front, the oldest fall off the end
+* ``take(topic)`` hands the whole buffer to the panel (no network call)
+* ``stash(topic, articles)`` takes back what the panel had not shown yet
+  when the user switches away, so switching back is instant too
+
+Articles come from NewsFeed.fetch_more, so nothing in a buffer is ever
+delivered again by the panel's own refills. A top-up only takes as many
+as the buffer has room for (``limit``). Memory is capped at *per_topic*
+articles per topic and *max_articles* in total; the least recently used
+topic is dropped first. Whatever is trimmed or evicted goes back to the
+feed (NewsFeed.put_back), so the panel still gets it on a later refill.
+
+    buffers = TopicBuffers(feed, executor=EXECUTOR)
+    buffers.warm(["rugby", "climate"])
+    articles = buffers.take("rugby")        # [] when not warm
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from requests import RequestException
+
+log = logging.getLogger("news_topics")
+
+
+class _Buffer:
+    __slots__ = ("topic", "articles", "filled_at")
+
+    def __init__(self, topic: str | None):
+        self.topic = topic                    # as the user said it, for fetching
+        self.articles: list[dict] = []        # newest first
+        self.filled_at = 0.0                  # time.monotonic() of the last top-up
+
+
+class TopicBuffers:
+    """Small per-topic article buffers, topped up in the background."""
+
+    def __init__(self, feed, *, store=None, per_topic: int = 8, max_articles: int = 40,
+                 low_water: int = 3, max_age: float = 3600.0, executor=None):
+        self.feed = feed                      # NewsFeed
+        self.store = store                    # NewsStore – fetched articles are saved too
+        self.per_topic    = per_topic
+        self.max_articles = max_articles
+        self.low_water    = low_water         # top up below this many
+        self.max_age      = max_age           # … or when older than this
+        self._executor = executor
+        self._buffers: OrderedDict[str, _Buffer] = OrderedDict()   # LRU first
+        self._inflight: set[str] = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "served": 0, "stashed": 0,
+                       "topups": 0, "topup_errors": 0, "fetched": 0, "evicted": 0}
+
+    @staticmethod
+    def key(topic: str | None) -> str:
+        return (topic or "").casefold().strip()
+
+    # ── public API ────────────────────────────────────────────────────
+    def take(self, topic: str | None) -> list[dict]:
+        """All buffered articles for *topic* (newest first), or [] – never blocks
+        on the network. The buffer is topped up again by the next warm()."""
+        with self._lock:
+            buf = self._buffers.get(self.key(topic))
+            if buf is None or not buf.articles:
+                self._stats["misses"] += 1
+                return []
+            self._buffers.move_to_end(self.key(topic))
+            articles, buf.articles = buf.articles, []
+            self._stats["hits"] += 1
+            self._stats["served"] += len(articles)
+            return articles
+
+    def stash(self, topic: str | None, articles) -> None:
+        """Keep the panel's unshown *articles* for *topic* when it moves on."""
+        articles = list(articles)
+        if not articles:
+            return
+        key = self.key(topic)
+        with self._lock:
+            buf = self._buffers.get(key) or _Buffer(topic)
+            urls = {a["url"] for a in articles}
+            merged = articles + [a for a in buf.articles if a["url"] not in urls]
+            buf.articles, spare = merged[:self.per_topic], merged[self.per_topic:]
+            buf.filled_at = buf.filled_at or time.monotonic()
+            self._buffers[key] = buf
+            self._buffers.move_to_end(key)
+            self._stats["stashed"] += len(buf.articles)
+            evicted = self._evict()
+        self._put_back([(topic, spare)] + evicted)
+
+    def warm(self, topics) -> int:
+        """Start a background top-up for every topic in *topics* (most wanted
+        first; only as many as the memory cap holds) that is low or old.
+        Returns how many were started."""
+        now, started = time.monotonic(), 0
+        for topic in list(topics)[:max(1, self.max_articles // self.per_topic)]:
+            key = self.key(topic)
+            with self._lock:
+                buf = self._buffers.get(key)
+                if key in self._inflight or (
+                        buf and len(buf.articles) >= self.low_water
+                        and now - buf.filled_at < self.max_age):
+                    continue
+                self._inflight.add(key)
+            started += 1
+            if self._executor is not None:
+                self._executor.submit(self._top_up, key, topic)
+            else:
+                threading.Thread(target=self._top_up, args=(key, topic),
+                                 name="news-topic-warm", daemon=True).start()
+        return started
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            topics = {b.topic or "": len(b.articles) for b in self._buffers.values()}
+        n = s["hits"] + s["misses"]
+        return dict(s, hit_rate=s["hits"] / n if n else 0.0, topics=topics,
+                    articles=sum(topics.values()))
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _top_up(self, key: str, topic: str | None) -> None:
+        with self._lock:
+            buf = self._buffers.get(key)
+            stale = buf is None or time.monotonic() - buf.filled_at >= self.max_age
+            # an old buffer is refreshed in full (its oldest go back to the
+            # feed), a low one only filled up
+            limit = self.per_topic if stale else self.per_topic - len(buf.articles)
+        try:
+            items = self.feed.fetch_more(topic, limit=max(limit, 1))
+        except (RequestException, ValueError) as e:
+            log.info("[NEWS] warming %r failed: %s", topic, e)
+            with self._lock:
+                self._inflight.discard(key)
+                self._stats["topup_errors"] += 1
+            return
+        if items and self.store is not None:
+            self.store.put(topic, items)
+        with self._lock:
+            self._inflight.discard(key)
+            self._stats["topups"] += 1
+            self._stats["fetched"] += len(items)
+            buf = self._buffers.get(key)
+            if buf is None:
+                buf = self._buffers[key] = _Buffer(topic)
+                self._buffers.move_to_end(key, last=False)   # warmed, not yet used
+            merged = items + buf.articles
+            buf.articles, spare = merged[:self.per_topic], merged[self.per_topic:]
+            buf.filled_at = time.monotonic()
+            evicted = self._evict()
+        self._put_back([(topic, spare)] + evicted)
+
+    def _evict(self) -> list[tuple[str | None, list[dict]]]:
+        """Drop least recently used topics until the memory cap holds (lock
+        held). Returns their (topic, articles) for _put_back()."""
+        total = sum(len(b.articles) for b in self._buffers.values())
+        evicted = []
+        while total > self.max_articles and len(self._buffers) > 1:
+            _, buf = self._buffers.popitem(last=False)
+            total -= len(buf.articles)
+            self._stats["evicted"] += len(buf.articles)
+            evicted.append((buf.topic, buf.articles))
+        return evicted
+
+    def _put_back(self, dropped) -> None:
+        """Articles that were fetched but will not be shown from here go back
+        to the feed, so its next refill for the topic hands them out again."""
+        for topic, articles in dropped:
+            if articles:
+                self.feed.put_back(topic, articles)
+
+
+# ─── CLI: time to first headline after a topic switch, cold vs. warm ───
+if __name__ == "__main__":
+    LATENCY = 0.4                                      # a typical Guardian round trip
+
+    class SlowFeed:
+        def __init__(self):
+            self.calls, self.n, self.returned = 0, 0, 0
+
+        def fetch_more(self, topic, *, limit=None):
+            time.sleep(LATENCY)
+            self.calls += 1
+            size = min(limit or 20, 20)
+            self.n += size
+            return [{"title": f"{topic} {i}", "url": f"https://example.org/{topic}/{i}"}
+                    for i in range(self.n, self.n - size, -1)]
+
+        def put_back(self, topic, articles):
+            self.returned += len(articles)
+
+    class Inline:                                      # run top-ups synchronously
+        def submit(self, fn, *a):
+            fn(*a)
+
+    feed = SlowFeed()
+    buffers = TopicBuffers(feed, executor=Inline())
+    favourites = ["rugby", "climate", "football", "technology", "politics", "science"]
+    buffers.warm(favourites)
+    print(f"warmed {len(favourites)} topics with {feed.calls} API calls; "
+          f"{buffers.stats()['articles']} articles held (cap {buffers.max_articles})")
+
+    for topic in ("rugby", "climate", "politics", "opera"):
+        t0 = time.perf_counter()
+        articles = buffers.take(topic) or feed.fetch_more(topic)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"  switch to {topic!r:12} {ms:7.2f} ms to first headline "
+              f"({'warm' if ms < LATENCY * 500 else 'cold'})")
+        buffers.stash(topic, articles[1:])             # the user moves on
+    s = buffers.stats()
+    print(f"hit rate {s['hit_rate']:.0%}, {s['fetched']} articles fetched by top-ups, "
+          f"{s['evicted']} evicted, {feed.returned} handed back to the feed; "
+          f"held: {s['topics']}")
@@ -0,0 +1,256 @@
+"""Streaming polyphase resampler for 16-bit PCM (and 8/24/32-bit → 16-bit).
+
+Replaces ``audioop.ratecv`` (removed in Python 3.13) for the playback path.
+Audio is converted chunk by chunk, so a WAV can be fed straight from disk or
+from a network response without loading the whole file; memory use is bounded
+by the chunk size and the filter length.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Iterable, Iterator
+
+import numpy as np
+
+# ----------------------------------------------------------------------
+# ▸ Filter design -------------------------------------------------------
+# ----------------------------------------------------------------------
+
+def _design_filter(up: int, down: int, taps_per_phase: int,
+                   beta: float) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into *up* polyphase branches.
+
+    Returns an ``(up, taps_per_phase)`` array; row *p* holds the taps used
+    for output samples that fall on phase *p* of the up-sampled grid.
+    """
+    n_taps = taps_per_phase * up
+    n_odd = n_taps - 1 + n_taps % 2             # odd length → integer delay
+    cutoff = 0.5 / max(up, down) * 0.94         # a little guard band
+    t = np.arange(n_odd) - (n_odd - 1) // 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n_odd, beta)
+    h *= up / h.sum()                           # unity gain after zero-stuffing
+    h = np.pad(h, (0, n_taps - n_odd))
+    return h.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+# ----------------------------------------------------------------------
+# ▸ Resampler -----------------------------------------------------------
+# ----------------------------------------------------------------------
+
+class StreamResampler:
+    """Rational-ratio resampler for interleaved 16-bit PCM byte chunks.
+
+    >>> rs = StreamResampler(22_050, 48_000, channels=1)
+    >>> out = rs.process(chunk) + rs.flush()
+
+    ``process`` accepts chunks of any length (even ones that split a frame)
+    and returns whatever output is ready; ``flush`` drains the filter tail.
+    """
+
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1, *,
+                 taps_per_phase: int = 24, beta: float = 8.0):
+        if channels not in (1, 2):
+            raise ValueError("only mono or stereo PCM is supported")
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.in_rate, self.out_rate = int(in_rate), int(out_rate)
+        self.channels = channels
+        self._up, self._down = self.out_rate // g, self.in_rate // g
+        self._taps = taps_per_phase
+        self._bank = _design_filter(self._up, self._down, taps_per_phase, beta)
+        self._tap_idx = np.arange(taps_per_phase)
+
+        # filter history (previous input frames) + split-frame leftovers
+        self._hist = np.zeros((taps_per_phase - 1, channels), np.float32)
+        self._rem = b""
+        # next output position on the up-sampled grid, relative to the
+        # first frame of the next chunk; starting at the group delay
+        # makes the output line up with the input
+        self._t = (taps_per_phase * self._up - 1) // 2
+        self._frames_in = 0
+        self._frames_out = 0
+
+    @property
+    def ratio(self) -> float:
+        return self._up / self._down
+
+    def process(self, data: bytes) -> bytes:
+        """Resample *data* (interleaved int16) and return the ready output."""
+        frame_bytes = self.SAMPLE_WIDTH * self.channels
+        data = self._rem + data
+        usable = len(data) - len(data) % frame_bytes
+        self._rem = data[usable:]
+        if not usable:
+            return b""
+        x = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32)
+        x = x.reshape(-1, self.channels)
+        self._frames_in += len(x)
+        return self._run(x)
+
+    def flush(self) -> bytes:
+        """Push zeros through the filter and return the remaining output."""
+        pad = np.zeros((self._taps, self.channels), np.float32)
+        tail = self._run(pad)
+        expected = math.ceil(self._frames_in * self._up / self._down)
+        keep = max(0, expected - (self._frames_out - len(tail) //
+                                  (self.SAMPLE_WIDTH * self.channels)))
+        tail = tail[:keep * self.SAMPLE_WIDTH * self.channels]
+        self._frames_out = expected
+        self._rem = b""
+        return tail
+
+    # ── internals ─────────────────────────────────────────────────────
+    def _run(self, x: np.ndarray) -> bytes:
+        up, down, taps = self._up, self._down, self._taps
+        n_new = len(x)
+        count = -(-(n_new * up - self._t) // down)     # ceil division
+        buf = np.concatenate((self._hist, x))
+        self._hist = buf[len(buf) - (taps - 1):]
+        if count <= 0:
+            self._t -= n_new * up
+            return b""
+
+        pos = self._t + down * np.arange(count)
+        phase = pos % up
+        base = pos // up + (taps - 1)
+        frames = buf[base[:, None] - self._tap_idx[None, :]]  # (n, taps, ch)
+        y = np.einsum("nt,ntc->nc", self._bank[phase], frames)
+
+        self._t += down * count - n_new * up
+        self._frames_out += count
+        return np.clip(np.rint(y), -32768, 32767).astype("<i2").tobytes()
+
+
+def resample_stream(chunks: Iterable[bytes], in_rate: int, out_rate: int,
+                    channels: int = 1, **kw) -> Iterator[bytes]:
+    """Lazily resample an iterable of int16 PCM chunks."""
+    rs = StreamResampler(in_rate, out_rate, channels, **kw)
+    for chunk in chunks:
+        out = rs.process(chunk)
+        if out:
+            yield out
+    tail = rs.flush()
+    if tail:
+        yield tail
+
+
+# ----------------------------------------------------------------------
+# ▸ Sample width --------------------------------------------------------
+# ----------------------------------------------------------------------
+
+def to_int16(data: bytes, width: int) -> bytes:
+    """Convert WAV PCM of *width* bytes per sample to int16 (top 16 bits).
+
+    8-bit WAV samples are unsigned, wider ones signed little-endian – the
+    same conversion ``audioop.lin2lin`` plus the 8-bit bias used to do.
+    """
+    if width == 2:
+        return data
+    if width == 1:
+        x = np.frombuffer(data, np.uint8).astype("<i2")
+        return ((x - 128) << 8).astype("<i2").tobytes()
+    if width in (3, 4):
+        b = np.frombuffer(data, np.uint8).reshape(-1, width)
+        return np.ascontiguousarray(b[:, width - 2:]).tobytes()
+    raise ValueError(f"unsupported sample width {width} (expected 1–4 bytes)")
+
+
+def to_int16_stream(chunks: Iterable[bytes], width: int) -> Iterable[bytes]:
+    """Lazily convert PCM chunks of any length to int16 (see to_int16).
+    Raises ValueError at once for a width it cannot convert."""
+    if width not in (1, 2, 3, 4):
+        raise ValueError(f"unsupported sample width {width} (expected 1–4 bytes)")
+    if width == 2:
+        return chunks
+
+    def convert():
+        rem = b""
+        for chunk in chunks:
+            data = rem + chunk
+            usable = len(data) - len(data) % width
+            rem = data[usable:]
+            if usable:
+                yield to_int16(data[:usable], width)
+
+    return convert()
+
+
+# ----------------------------------------------------------------------
+# ▸ CLI: quality check & CPU benchmark ---------------------------------
+# ----------------------------------------------------------------------
+
+def _tone(rate: int, seconds: float, channels: int, freq: float = 1000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    sig = [0.5 * np.sin(2 * np.pi * freq * t),
+           0.5 * np.sin(2 * np.pi * freq * 0.63 * t)][:channels]
+    return np.stack(sig, axis=1)
+
+
+def _snr_db(in_rate: int, out_rate: int, channels: int,
+            chunk: int = 1000) -> float:
+    """Resample a tone in *chunk*-byte pieces; compare with the exact tone."""
+    ref_in = _tone(in_rate, 1.0, channels)
+    pcm = (ref_in * 32767).astype("<i2").tobytes()
+    out = b"".join(resample_stream(
+        (pcm[i:i + chunk] for i in range(0, len(pcm), chunk)),
+        in_rate, out_rate, channels))
+    y = np.frombuffer(out, "<i2").reshape(-1, channels) / 32767
+    ref = _tone(out_rate, 1.0, channels)[:len(y)]
+    edge = out_rate // 20                       # ignore filter ramp-in/out
+    err = y[edge:-edge] - ref[edge:-edge]
+    return 10 * np.log10(np.sum(ref[edge:-edge] ** 2) / np.sum(err ** 2))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import wave
+
+    ap = argparse.ArgumentParser(description="Polyphase resampler checks")
+    ap.add_argument("--bench", metavar="WAV", nargs="?", const="",
+                    help="CPU benchmark (default: 10 min synthetic reading)")
+    args = ap.parse_args()
+
+    if args.bench is None:
+        print("SNR vs. analytic reference (pass ≥ 60 dB)")
+        worst = math.inf
+        for src in (8_000, 16_000, 22_050, 24_000, 44_100):
+            for ch in (1, 2):
+                snr = _snr_db(src, 48_000, ch)
+                worst = min(worst, snr)
+                print(f"  {src:>6} Hz → 48000 Hz  ch={ch}:  {snr:6.1f} dB")
+        print("PASS" if worst >= 60 else "FAIL", f"(worst {worst:.1f} dB)")
+    else:
+        if args.bench:
+            with wave.open(args.bench, "rb") as wf:
+                rate, ch = wf.getframerate(), wf.getnchannels()
+                pcm = wf.readframes(wf.getnframes())
+        else:
+            # ~10 minutes of 22.05 kHz "speech": modulated harmonics + noise
+            rate, ch = 22_050, 1
+            rng = np.random.default_rng(0)
+            t = np.arange(rate * 600) / rate
+            env = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+            sig = env * (0.3 * np.sin(2 * np.pi * 140 * t)
+                         + 0.2 * np.sin(2 * np.pi * 1100 * t)
+                         + 0.05 * rng.standard_normal(len(t)))
+            pcm = (sig * 32767).astype("<i2").tobytes()
+        secs = len(pcm) / (2 * ch * rate)
+        chunks = [pcm[i:i + 4096] for i in range(0, len(pcm), 4096)]
+
+        t0 = time.process_time()
+        for _ in resample_stream(chunks, rate, 48_000, ch):
+            pass
+        cpu = time.process_time() - t0
+        print(f"polyphase: {secs:.0f} s of audio in {cpu:.2f} s CPU "
+              f"({secs / cpu:.0f}× real time)")
+        try:
+            import audioop                      # gone in Python 3.13
+            t0 = time.process_time()
+            audioop.ratecv(pcm, 2, ch, rate, 48_000, None)
+            print(f"audioop.ratecv (whole file): "
+                  f"{time.process_time() - t0:.2f} s CPU")
+        except ImportError:
+            pass
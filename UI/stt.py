@@ -1,11 +1,57 @@
 import os
+import wave
+import logging
+import difflib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from ibm_watson import SpeechToTextV1
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
+from ibm_auth import IBM
+from stt_local import LocalRecognizer
+
+log = logging.getLogger("stt")
 
 # Read from .env / environment
 API_KEY = os.getenv("IBM_STT_APIKEY")
 URL     = os.getenv("IBM_STT_URL")
 
+# ─── local / cloud routing policy ──────────────────────────────────────
+SHORT_UTTERANCE_SEC = float(os.getenv("STT_LOCAL_MAX_SEC", "3.0"))  # commands
+CLOUD_DEADLINE_SEC  = float(os.getenv("STT_CLOUD_DEADLINE", "4.0"))  # then go local
+
+LOCAL_STT = LocalRecognizer()
+_POOL     = ThreadPoolExecutor(max_workers=2, thread_name_prefix="stt")
+
+def _stt_client() -> SpeechToTextV1:
+    """The shared, long-lived STT client (token and connections are reused)."""
+    if not API_KEY or not URL:
+        raise RuntimeError("IBM STT credentials not set in environment")
+    return IBM.service(SpeechToTextV1, API_KEY, URL)
+
+def prewarm() -> None:
+    """
+    Get the STT path ready while the user is still talking: fetch/refresh
+    the IAM token if it is missing or near expiry, and open the TLS
+    connection so it sits in the client's keep-alive pool.
+    """
+    client = _stt_client()
+    IBM.token(API_KEY)
+    client.http_client.head(URL, timeout=5)
+
+def _recognize_cloud(filename: str) -> str:
+    """Send the WAV file to Watson STT; raises on any error."""
+    with open(filename, 'rb') as audio_file:
+        response = _stt_client().recognize(
+            audio=audio_file,
+            content_type='audio/wav',
+            model='en-US_BroadbandModel'
+        ).get_result()
+
+    transcripts = [
+        alt["transcript"]
+        for result in response.get("results", [])
+        for alt in result.get("alternatives", [])
+    ]
+    return " ".join(transcripts).strip()
+
 def transcribe_audio_ibm(filename: str = 'output.wav') -> str:
     """
     Reads IBM_STT_APIKEY and IBM_STT_URL from environment,
@@ -19,33 +65,85 @@ def transcribe_audio_ibm(filename: str = 'output.wav') -> str:
     print(f"[STT] Using URL: {URL}")
 
     try:
-        authenticator = IAMAuthenticator(API_KEY)
-        stt_service = SpeechToTextV1(authenticator=authenticator)
-        stt_service.set_service_url(URL)
-
-        with open(filename, 'rb') as audio_file:
-            response = stt_service.recognize(
-                audio=audio_file,
-                content_type='audio/wav',
-                model='en-US_BroadbandModel'
-            ).get_result()
-
-        transcripts = [
-            alt["transcript"]
-            for result in response.get("results", [])
-            for alt in result.get("alternatives", [])
-        ]
-
-        if not transcripts:
+        transcript = _recognize_cloud(filename)
+
+        if not transcript:
             print("[STT] No transcript returned.")
         else:
-            print(f"[STT] Transcript: {' '.join(transcripts)}")
+            print(f"[STT] Transcript: {transcript}")
 
-        return " ".join(transcripts).strip()
+        return transcript
 
     except Exception as e:
         print(f"[STT ERROR] {e}")
         return ""
 
+# ─── routed entry point ─────────────────────────────────────────────────
+def _duration(filename: str) -> float:
+    with wave.open(filename, "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate() or 1)
+
+def _agreement(a: str, b: str) -> float:
+    """Word-level similarity of two transcripts (1.0 = identical)."""
+    wa, wb = a.lower().split(), b.lower().split()
+    if not wa and not wb:
+        return 1.0
+    return difflib.SequenceMatcher(None, wa, wb).ratio()
+
+def _log_agreement(local_text: str, cloud_text: str) -> None:
+    log.info("[STT] agreement %.2f  local=%r  cloud=%r",
+             _agreement(local_text, cloud_text), local_text, cloud_text)
+
+def _local(filename: str, *, partial: bool = True) -> str:
+    """LOCAL_STT.transcribe(), but '' instead of raising."""
+    try:
+        return LOCAL_STT.transcribe(filename, partial=partial)
+    except Exception as e:              # wave.Error, EOFError, Vosk errors …
+        log.warning("[STT] local recogniser failed on %s: %s", filename, e)
+        return ""
+
+def transcribe(filename: str = 'output.wav') -> str:
+    """
+    Transcribe with the best available recogniser:
+
+    * short utterances (≤ SHORT_UTTERANCE_SEC) → on-device, command
+      vocabulary – unless a word was not in it ([unk]) or nothing was
+      recognised, then Watson
+    * otherwise Watson, unless it errors or takes longer than
+      CLOUD_DEADLINE_SEC – then the local result is used instead
+
+    When both run, their agreement is logged. Never raises: '' means
+    nothing was understood. Without a local model this is exactly
+    transcribe_audio_ibm().
+    """
+    if not LOCAL_STT.available():
+        return transcribe_audio_ibm(filename)
+
+    try:
+        short = _duration(filename) <= SHORT_UTTERANCE_SEC
+    except (OSError, wave.Error, EOFError):
+        short = False
+    if short:
+        text = _local(filename, partial=False)
+        if text:
+            log.info("[STT] local transcript: %r", text)
+            return text
+
+    cloud = _POOL.submit(_recognize_cloud, filename)
+    try:
+        text = cloud.result(timeout=CLOUD_DEADLINE_SEC)
+        log.info("[STT] cloud transcript: %r", text)
+        return text
+    except FutureTimeout:
+        local_text = _local(filename)
+        log.warning("[STT] cloud slower than %.1f s – using local %r",
+                    CLOUD_DEADLINE_SEC, local_text)
+        cloud.add_done_callback(
+            lambda f: f.exception() or _log_agreement(local_text, f.result()))
+        return local_text
+    except Exception as e:
+        log.warning("[STT] cloud failed (%s) – using local recogniser", e)
+        return _local(filename)
+
 if __name__ == "__main__":
     print(transcribe_audio_ibm())
@@ -0,0 +1,87 @@
+"""Offline speech recogniser for short voice commands.
+
+Uses Vosk (optional – ``pip install vosk`` and unpack a small English model
+such as ``vosk-model-small-en-us-0.15`` into ``data/``). The decoder is
+constrained to the words our intents need, which keeps it fast on the Pi
+CPU and makes it far less likely to hallucinate off-vocabulary words.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import wave
+from pathlib import Path
+
+try:
+    import vosk
+    vosk.SetLogLevel(-1)
+except ModuleNotFoundError:
+    vosk = None
+
+log = logging.getLogger("stt")
+
+MODEL_DIR = Path(os.getenv("VOSK_MODEL_DIR") or
+                 Path(__file__).resolve().parent.parent / "data" / "vosk-model-small-en-us-0.15")
+
+# ─── command vocabulary (get_weather • get_news • play_music • reminders) ────
+COMMAND_VOCAB = sorted(set("""
+    what what's whats is the a an in at for on of about me my to and please
+    weather forecast temperature rain raining sunny cold hot warm wind snow
+    today tonight tomorrow morning afternoon evening night week weekend now
+    monday tuesday wednesday thursday friday saturday sunday
+    news headlines latest tell show read story stories sport sports football
+    rugby cricket tennis politics business technology science health
+    music play song songs by artist listen put on some radio stop pause
+    remind reminder reminders add set have meeting appointment doctor
+    dentist medicine pills tablets take call cancel delete remove clear all
+    every day everyday lunch dinner breakfast walk shopping
+    london manchester leeds liverpool birmingham bristol glasgow edinburgh
+    cardiff belfast newcastle sheffield nottingham leicester oxford cambridge
+    york brighton paris berlin madrid rome dublin new tokyo seoul
+""".split()))
+
+
+class LocalRecognizer:
+    """Lazy-loaded Vosk recogniser restricted to COMMAND_VOCAB."""
+
+    def __init__(self, model_dir: str | os.PathLike = MODEL_DIR,
+                 vocab: list[str] = COMMAND_VOCAB):
+        self.model_dir = Path(model_dir)
+        self._grammar = json.dumps(list(vocab) + ["[unk]"])
+        self._model = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return vosk is not None and self.model_dir.is_dir()
+
+    def load(self) -> None:
+        """Load the acoustic model (a few seconds – call from a worker)."""
+        with self._lock:
+            if self._model is None and self.available():
+                self._model = vosk.Model(str(self.model_dir))
+                log.info("[STT] local model loaded from %s", self.model_dir)
+
+    def transcribe(self, filename: str, *, partial: bool = True) -> str:
+        """
+        Decode a 16-bit mono WAV and return the transcript ('' if none).
+
+        Words outside the vocabulary decode as ``[unk]``. They are dropped
+        from the transcript; with ``partial=False`` a transcript that had
+        any is returned as '' instead – "weather in [unk]" is not "weather
+        in", and the caller should ask the cloud. Raises on unreadable
+        audio (wave.Error, EOFError, OSError) and on Vosk errors.
+        """
+        self.load()
+        if self._model is None:
+            return ""
+        with wave.open(filename, "rb") as wf:
+            rec = vosk.KaldiRecognizer(self._model, wf.getframerate(), self._grammar)
+            for data in iter(lambda: wf.readframes(4000), b""):
+                rec.AcceptWaveform(data)
+        words = json.loads(rec.FinalResult()).get("text", "").split()
+        if not partial and "[unk]" in words:
+            return ""
+        return " ".join(w for w in words if w != "[unk]")
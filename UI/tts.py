@@ -1,45 +1,228 @@
+import logging
 import os
+import shutil
 from pathlib import Path
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
+from typing import Iterable, Iterator
+from ibm_auth import IBM
 from ibm_watson import TextToSpeechV1
+from tts_cache import TTSCache
+from audio_decode import (SpeechStream, decode_ogg_opus, finalise_wav, open_speech,
+                          opuslib, wav_stream)
+
+log = logging.getLogger("tts")
 
 # ─── credentials from environment / UI/.env ─────────────────────────
 API_KEY = os.getenv("IBM_TTS_APIKEY")
 URL     = os.getenv("IBM_TTS_URL")
 
-if not API_KEY or not URL:
-    raise RuntimeError("IBM TTS credentials (IBM_TTS_APIKEY / IBM_TTS_URL) "
-                       "are missing – set them in UI/.env")
+# ─── output formats ─────────────────────────────────────────────────
+# name → (Accept header, default sample-rate). 48 kHz WAV is ~96 KB per
+# second of speech; 16 kHz WAV is a third of that and Opus ~3-4 KB/s.
+FORMATS = {
+    "wav":      ("audio/wav;rate={rate}",             48_000),
+    "wav-22k":  ("audio/wav;rate={rate}",             22_050),
+    "wav-16k":  ("audio/wav;rate={rate}",             16_000),
+    "ogg-opus": ("audio/ogg;codecs=opus;rate={rate}", 48_000),
+}
+TTS_FORMAT = os.getenv("IBM_TTS_FORMAT", "wav")
+
+def _accept(fmt: str | None, sample_rate: int | None) -> tuple[str, int]:
+    """Resolve a format name to (Accept header, sample-rate)."""
+    fmt = fmt or TTS_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown TTS format {fmt!r} – pick one of {list(FORMATS)}")
+    if fmt == "ogg-opus" and opuslib is None:
+        log.warning("opuslib unavailable – using wav-16k instead of ogg-opus")
+        fmt = "wav-16k"
+    template, default_rate = FORMATS[fmt]
+    rate = sample_rate or default_rate
+    return template.format(rate=rate), rate
+
+# ─── synthesised-audio cache (repo data/ folder) ────────────────────
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "tts_cache"
+CACHE     = TTSCache(os.getenv("TTS_CACHE_DIR") or CACHE_DIR,
+                     max_bytes=int(os.getenv("TTS_CACHE_MB", "100")) * 2**20)
+
+def _tts_client() -> TextToSpeechV1:
+    """The shared, long-lived TTS client from the credential manager."""
+    if not API_KEY or not URL:
+        raise RuntimeError("IBM TTS credentials (IBM_TTS_APIKEY / IBM_TTS_URL) "
+                           "are missing – set them in UI/.env")
+    return IBM.service(TextToSpeechV1, API_KEY, URL)
+
+def prewarm() -> None:
+    """Refresh the IAM token if due and open a keep-alive connection to TTS."""
+    client = _tts_client()
+    IBM.token(API_KEY)
+    client.http_client.head(URL, timeout=5)
+
+def _tee_to_cache(blocks: Iterable[bytes], key: str) -> Iterator[bytes]:
+    """Pass blocks through; store them in CACHE only if the stream completes."""
+    parts, complete = [], False
+    try:
+        for block in blocks:
+            parts.append(block)
+            yield block
+        complete = True
+    finally:
+        if complete:
+            data = b"".join(parts)
+            CACHE.put(key, finalise_wav(data) if data[:4] == b"RIFF" else data)
+
+def _decoder(accept: str):
+    return decode_ogg_opus if accept.startswith("audio/ogg") else wav_stream
 
-# ─── build ONE authenticator + client at import-time ─────────────────
-_authenticator = IAMAuthenticator(API_KEY)
-_TTS_CLIENT    = TextToSpeechV1(authenticator=_authenticator)
-_TTS_CLIENT.set_service_url(URL)
 
 # ─── public API  -----------------------------------------------------
+def synthesize_cached(text: str,
+                      *,
+                      voice: str = "en-US_MichaelV3Voice",
+                      sample_rate: int | None = None,
+                      fmt: str | None = None) -> Path:
+    """
+    Return the audio file for *text*, synthesising only on a cache miss.
+    The payload is in the requested format – open it with open_speech().
+    """
+    accept, rate = _accept(fmt, sample_rate)
+    key = CACHE.key(text, voice, rate, accept)
+    hit = CACHE.get(key)
+    if hit:
+        return hit
+
+    # Watson call (network I/O -- may take a few seconds)
+    resp = _tts_client().synthesize(
+        text, voice=voice, accept=accept
+    ).get_result()
+    return CACHE.put(key, resp.content)
+
+
 def text_to_speech_ibm(text: str,
                        output_filename: str | os.PathLike = "output_speech.wav",
                        *,
                        voice: str = "en-US_MichaelV3Voice",
                        sample_rate: int = 48_000) -> None:
 
-    accept = f"audio/wav;rate={sample_rate}"
-
-    # Watson call (network I/O -- may take a few seconds)
-    resp = _TTS_CLIENT.synthesize(
-        text, voice=voice, accept=accept
-    ).get_result()
+    cached = synthesize_cached(text, voice=voice, sample_rate=sample_rate, fmt="wav")
 
-    # write the audio stream to disk
+    # copy the cached audio to the requested file
     out_path = Path(output_filename).expanduser()
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(cached, out_path)
+
+
+def synthesize_stream(text: str,
+                      *,
+                      voice: str = "en-US_MichaelV3Voice",
+                      sample_rate: int | None = None,
+                      fmt: str | None = None,
+                      chunk_size: int = 4096,
+                      client: TextToSpeechV1 | None = None) -> SpeechStream:
+    """
+    Streaming variant of text_to_speech_ibm: returns as soon as the audio
+    header arrives and yields PCM while Watson is still synthesising.
+    Closing the stream closes the HTTP response. Cached text is played
+    straight from disk; a fully received stream is added to the cache.
+    """
+    accept, rate = _accept(fmt, sample_rate)
+    key = CACHE.key(text, voice, rate, accept)
+    hit = CACHE.get(key)
+    if hit:
+        return open_speech(hit)
+
+    resp = (client or _tts_client()).synthesize(
+        text, voice=voice, accept=accept, stream=True
+    ).get_result()
+    blocks = _tee_to_cache(resp.iter_content(chunk_size), key)
+    return _decoder(accept)(blocks, on_close=resp.close)
 
-    with out_path.open("wb") as fh:
-        fh.write(resp.content)
+# ─── fake trickling TTS server (for --fake) ─────────────────────────
+def _serve_fake_tts(seconds: float = 4.0, rate: int = 48_000,
+                    realtime: float = 0.5):
+    """
+    Start a local HTTP server that mimics /v1/synthesize: it sends a WAV
+    header with unknown length, then 100 ms audio blocks at *realtime*
+    times playback speed. Returns the server (already serving).
+    """
+    import math, struct, threading, time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    block = b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 440 * i / rate)))
+                     for i in range(rate // 10))
+    header = (b"RIFF" + b"\xff\xff\xff\xff" + b"WAVE"
+              + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, rate, rate * 2, 2, 16)
+              + b"data" + b"\xff\xff\xff\xff")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.end_headers()
+            self.wfile.write(header)
+            for _ in range(int(seconds * 10)):
+                time.sleep(0.1 / realtime)
+                self.wfile.write(block)
+                self.wfile.flush()
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
 
 # ─── quick CLI test ─────────────────────────────────────────────────
 if __name__ == "__main__":
-    sentence = input("Type something to synthesize → ").strip() or "Hello!"
-    print("Synthesising…")
-    text_to_speech_ibm(sentence, "tts_test.wav")
-    print("✓ Saved to tts_test.wav")
+    import sys, tempfile, time
+
+    if "--fake" in sys.argv:
+        from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+        server = _serve_fake_tts()
+        fake = TextToSpeechV1(authenticator=NoAuthAuthenticator())
+        fake.set_service_url(f"http://127.0.0.1:{server.server_port}")
+
+        CACHE = TTSCache(tempfile.mkdtemp())      # keep the real cache clean
+        for run in ("cold", "cached"):
+            t0 = time.perf_counter()
+            speech = synthesize_stream("fake", client=fake)
+            first, total = None, 0
+            for chunk in speech.chunks:
+                first = first or time.perf_counter() - t0
+                total += len(chunk)
+            done = time.perf_counter() - t0
+            print(f"{run:>6}: first audio after {first * 1000:.0f} ms, "
+                  f"complete after {done * 1000:.0f} ms "
+                  f"({total / (speech.rate * speech.sampwidth):.1f} s of audio)")
+        print("cache:", CACHE.stats())
+        server.shutdown()
+    elif "--formats" in sys.argv:
+        # payload size, download time and decode CPU per output format
+        from resample import resample_stream
+        text = ("Here is the news. Heavy rain is expected across the north "
+                "of England tomorrow, with up to forty millimetres in places.")
+        print(f"{'format':<9} {'bytes':>8} {'KB/s':>6} {'download':>9} {'decode CPU':>11}")
+        for name in FORMATS:
+            accept, rate = _accept(name, None)
+            if FORMATS[name][0].split(";")[0] not in accept:
+                continue                              # fell back, skip
+            t0 = time.perf_counter()
+            payload = _tts_client().synthesize(text, accept=accept,
+                                                voice="en-US_MichaelV3Voice").get_result().content
+            dl = time.perf_counter() - t0
+            c0 = time.process_time()
+            speech = _decoder(accept)([payload])
+            pcm = speech.chunks
+            if speech.rate not in (44100, 48000):
+                pcm = resample_stream(pcm, speech.rate, 48_000, speech.channels)
+            n = sum(len(c) for c in pcm)
+            cpu = time.process_time() - c0
+            secs = n / (48_000 * 2 * speech.channels)
+            print(f"{name:<9} {len(payload):>8} {len(payload) / secs / 1024:>6.1f} "
+                  f"{dl * 1000:>7.0f}ms {cpu * 1000:>9.1f}ms")
+    else:
+        sentence = input("Type something to synthesize → ").strip() or "Hello!"
+        print("Synthesising…")
+        text_to_speech_ibm(sentence, "tts_test.wav")
+        print("✓ Saved to tts_test.wav")
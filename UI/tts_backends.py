@@ -0,0 +1,207 @@
+"""Pluggable speech back-ends and the router that picks one per utterance.
+
+* CloudTTSBackend – Watson, sentence-pipelined (best voice, needs network)
+* LocalTTSBackend – espeak-ng on the Pi CPU (robotic, but instant/offline)
+
+TTSRouter sends short or latency-critical text to the local engine and
+long-form reading to the cloud, unless the measured cloud latency is over
+budget or the last cloud call failed. Time-to-first-audio is recorded per
+back-end.
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import shutil
+import subprocess
+import threading
+from time import monotonic, perf_counter
+from typing import Callable
+
+from audio_decode import SpeechStream, wav_stream
+from tts_pipeline import pipelined_speech
+
+log = logging.getLogger("tts")
+
+
+# ----------------------------------------------------------------------
+# ▸ Back-ends -----------------------------------------------------------
+# ----------------------------------------------------------------------
+
+class TTSBackend(abc.ABC):
+    """Interface: turn text into a SpeechStream as quickly as possible."""
+
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def speak(self, text: str) -> SpeechStream:
+        ...
+
+
+class CloudTTSBackend(TTSBackend):
+    name = "cloud"
+
+    def __init__(self, **tts_kw):
+        self._kw = tts_kw
+
+    def speak(self, text: str) -> SpeechStream:
+        return pipelined_speech(text, **self._kw)
+
+
+class LocalTTSBackend(TTSBackend):
+    """espeak-ng (or espeak) writing a WAV to stdout, streamed as it runs."""
+
+    name = "local"
+
+    def __init__(self, voice: str = "en-gb", words_per_min: int = 150,
+                 binary: str | None = None):
+        self.voice, self.wpm = voice, words_per_min
+        self.binary = binary or shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self) -> bool:
+        return self.binary is not None
+
+    def speak(self, text: str) -> SpeechStream:
+        if not self.binary:
+            raise RuntimeError("espeak-ng not installed")
+        # text on stdin, not argv: a reply like "-5 degrees" is not an option
+        proc = subprocess.Popen(
+            [self.binary, "-v", self.voice, "-s", str(self.wpm), "--stdout", "--stdin"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+        def _feed():                          # own thread: stdout is read meanwhile
+            try:
+                proc.stdin.write(text.encode("utf-8"))
+                proc.stdin.close()
+            except OSError:                   # espeak exited / was killed
+                pass
+
+        threading.Thread(target=_feed, name="espeak-stdin", daemon=True).start()
+
+        def _close():
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+        return wav_stream(iter(lambda: proc.stdout.read(4096), b""), on_close=_close)
+
+
+# ----------------------------------------------------------------------
+# ▸ Router --------------------------------------------------------------
+# ----------------------------------------------------------------------
+
+class TTSRouter:
+    """
+    Choose a back-end per utterance.
+
+    Local is used when the text is short (≤ *max_local_chars*), when the
+    caller marks it *urgent*, or when the cloud looks unhealthy: its
+    smoothed time-to-first-audio exceeds *latency_budget* seconds, or its
+    last call failed less than *retry_after* seconds ago.
+    """
+
+    def __init__(self, local: TTSBackend, cloud: TTSBackend, *,
+                 max_local_chars: int = 60, latency_budget: float = 2.5,
+                 retry_after: float = 120.0, alpha: float = 0.3):
+        self.local, self.cloud = local, cloud
+        self.max_local_chars = max_local_chars
+        self.latency_budget  = latency_budget
+        self.retry_after     = retry_after
+        self._alpha = alpha
+        self._cloud_ewma: float | None = None
+        self._cloud_down_since: float | None = None
+        self._lock  = threading.Lock()
+        self._stats = {b.name: {"calls": 0, "errors": 0, "ttfa_sum": 0.0,
+                                "ttfa_max": 0.0}
+                       for b in (local, cloud)}
+
+    def choose(self, text: str, *, urgent: bool = False) -> TTSBackend:
+        if not self.local.available():
+            return self.cloud
+        if urgent or len(text) <= self.max_local_chars:
+            return self.local
+        return self.cloud if self.cloud_preferred() else self.local
+
+    def cloud_preferred(self) -> bool:
+        """Should long-form text go to the cloud right now?"""
+        if not self.local.available():
+            return True
+        with self._lock:
+            since = self._cloud_down_since
+            if since is not None:
+                # unhealthy: stay local until a retry is due, then probe
+                return monotonic() - since >= self.retry_after
+            if (self._cloud_ewma or 0.0) > self.latency_budget:
+                self._cloud_down_since = monotonic()
+                return False
+        return True
+
+    def speak(self, text: str, *, urgent: bool = False) -> SpeechStream:
+        """Synthesise *text* on the chosen back-end, falling back to local."""
+        backend = self.choose(text, urgent=urgent)
+        try:
+            return self._timed(backend, text)
+        except Exception:
+            if backend is self.local or not self.local.available():
+                raise
+            log.warning("cloud TTS failed – falling back to local engine")
+            return self._timed(self.local, text)
+
+    def speak_pipeline(self, pipe, text: Callable[[], str]) -> SpeechStream | None:
+        """First audio of a cloud SpeechPipeline the caller is still feeding
+        (for text the router chose the cloud for), timed like speak(). If the
+        cloud fails, the cloud is marked down and the complete text – text()
+        blocks until it is known – is spoken locally; None if it is empty."""
+        try:
+            return self._timed(self.cloud, "", speak=lambda _: pipe.speech())
+        except Exception:
+            if not self.local.available():
+                raise
+            log.warning("cloud TTS failed – falling back to local engine")
+            full = text()
+            return self._timed(self.local, full) if full else None
+
+    def stats(self) -> dict:
+        """Per back-end call count, errors and mean/max time-to-first-audio."""
+        with self._lock:
+            out = {}
+            for name, s in self._stats.items():
+                ok = s["calls"] - s["errors"]
+                out[name] = {"calls": s["calls"], "errors": s["errors"],
+                             "ttfa_mean": s["ttfa_sum"] / ok if ok else None,
+                             "ttfa_max": s["ttfa_max"]}
+            out["cloud_ttfa_ewma"] = self._cloud_ewma
+            return out
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _timed(self, backend: TTSBackend, text: str, *,
+               speak: Callable[[str], SpeechStream] | None = None) -> SpeechStream:
+        t0 = perf_counter()
+        try:
+            speech = (speak or backend.speak)(text)     # returns at first audio
+        except Exception:
+            with self._lock:
+                self._stats[backend.name]["calls"] += 1
+                self._stats[backend.name]["errors"] += 1
+                if backend is self.cloud:
+                    self._cloud_down_since = monotonic()
+            raise
+        ttfa = perf_counter() - t0
+        with self._lock:
+            s = self._stats[backend.name]
+            s["calls"] += 1
+            s["ttfa_sum"] += ttfa
+            s["ttfa_max"] = max(s["ttfa_max"], ttfa)
+            if backend is self.cloud:
+                self._cloud_down_since = None
+                self._cloud_ewma = ttfa if self._cloud_ewma is None else \
+                    self._alpha * ttfa + (1 - self._alpha) * self._cloud_ewma
+        log.info("[TTS] %s: first audio after %.2f s (%s)", backend.name, ttfa,
+                 f"{len(text)} chars" if text else "streamed")
+        return speech
@@ -0,0 +1,143 @@
+"""Content-addressed on-disk cache for synthesised speech.
+
+Entries are keyed by ``sha256(text, voice, sample_rate, format)`` and kept
+under a byte quota with least-recently-used eviction. Writes go to a temp
+file in the cache folder and are ``os.replace``-d into place, so a crash
+never leaves a half-written entry behind.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+log = logging.getLogger("tts_cache")
+
+# temp-dir WAVs written by older versions of the UI, never cleaned up
+ORPHAN_PATTERNS = ("chatbot_*.wav", "news_*.wav")
+
+
+class TTSCache:
+    """Size-bounded LRU cache of audio blobs, one file per entry."""
+
+    SUFFIX = ".audio"
+
+    def __init__(self, root: str | os.PathLike, max_bytes: int = 100 * 2**20):
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.hits = self.misses = self.evictions = 0
+        self._lock  = threading.Lock()
+        self._index: OrderedDict[str, int] = OrderedDict()   # key → size
+        self._bytes = 0
+        self._load_index()
+
+    # ── keys ──────────────────────────────────────────────────────────
+    @staticmethod
+    def key(text: str, voice: str, sample_rate: int, fmt: str) -> str:
+        """Stable content hash of everything that affects the audio."""
+        raw = "\x1f".join((text, voice, str(sample_rate), fmt))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}{self.SUFFIX}"
+
+    # ── public API ────────────────────────────────────────────────────
+    def get(self, key: str) -> Path | None:
+        """Return the cached file for *key* (marking it recently used)."""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            p = self.path(key)
+            try:
+                os.utime(p)                  # mtime doubles as LRU clock
+            except FileNotFoundError:        # removed behind our back
+                self._bytes -= self._index.pop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return p
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Atomically store *data* under *key* and evict down to quota."""
+        p = self.path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, p)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            self._bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._bytes += len(data)
+            self._evict()
+        return p
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":   len(self._index),
+                "bytes":     self._bytes,
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "hit_rate":  self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def cleanup_orphans(self, tmp_dir: str | os.PathLike | None = None,
+                        max_age_sec: float = 3600) -> int:
+        """
+        Delete stale ``chatbot_*.wav`` / ``news_*.wav`` files from the temp
+        folder plus leftover ``*.tmp`` files from interrupted cache writes.
+        Returns the number of files removed.
+        """
+        cutoff  = time.time() - max_age_sec
+        folders = [(Path(tmp_dir or tempfile.gettempdir()), ORPHAN_PATTERNS),
+                   (self.root, ("*.tmp",))]
+        removed = 0
+        for folder, patterns in folders:
+            for pattern in patterns:
+                for f in folder.glob(pattern):
+                    try:
+                        if f.stat().st_mtime < cutoff:
+                            f.unlink()
+                            removed += 1
+                    except OSError:
+                        pass
+        if removed:
+            log.info("removed %d orphaned audio files", removed)
+        return removed
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _load_index(self):
+        entries = []
+        for f in self.root.glob(f"*{self.SUFFIX}"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, f.stem, st.st_size))
+        for _, key, size in sorted(entries):          # oldest first
+            self._index[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            self.path(key).unlink(missing_ok=True)
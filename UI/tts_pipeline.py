@@ -0,0 +1,231 @@
+"""Sentence-pipelined speech synthesis.
+
+Long text is split into sentences. The first one is streamed from Watson
+straight away; the following ones are fetched concurrently by a small
+per-pipeline thread pool, and everything is played back in order as ONE
+SpeechStream, so a single output stream covers the whole reply.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, Iterator
+
+from tts import SpeechStream, open_speech, synthesize_cached, synthesize_stream
+
+log = logging.getLogger("tts")
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text: str, min_chars: int = 12) -> list[str]:
+    """Split on sentence punctuation; glue very short fragments forward."""
+    out, carry = [], ""
+    for part in _SENTENCE_END.split(text.strip()):
+        carry = f"{carry} {part}".strip() if carry else part.strip()
+        if len(carry) >= min_chars:
+            out.append(carry)
+            carry = ""
+    if carry:
+        if out:
+            out[-1] = f"{out[-1]} {carry}"
+        else:
+            out.append(carry)
+    return out
+
+
+class SentenceSplitter:
+    """
+    Incremental split_sentences(): push text as it is generated, get back
+    the sentences that are complete so far; flush() returns the rest.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buf, self._carry = "", ""
+
+    def push(self, delta: str) -> list[str]:
+        self._buf += delta
+        *done, self._buf = _SENTENCE_END.split(self._buf)
+        out = []
+        for part in done:
+            self._carry = f"{self._carry} {part}".strip() if self._carry else part.strip()
+            if len(self._carry) >= self.min_chars:
+                out.append(self._carry)
+                self._carry = ""
+        return out
+
+    def flush(self) -> list[str]:
+        rest = f"{self._carry} {self._buf}".strip()
+        self._buf, self._carry = "", ""
+        return [rest] if rest else []
+
+
+class SpeechPipeline:
+    """
+    Feed text in (all at once or sentence by sentence), read audio out.
+
+    >>> pipe = SpeechPipeline()
+    >>> pipe.feed(reply); pipe.close()
+    >>> play_speech(pipe.speech())
+
+    Closing the returned SpeechStream (e.g. the user tapped stop) cancels
+    every sentence that hasn't started and closes the live HTTP stream.
+    """
+
+    def __init__(self, *, workers: int = 3,
+                 stream_fn: Callable[..., SpeechStream] = synthesize_stream,
+                 fetch_fn: Callable[..., object] = synthesize_cached,
+                 **tts_kw):
+        self._stream_fn, self._fetch_fn, self._kw = stream_fn, fetch_fn, tts_kw
+        self._pool    = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix="tts-pipe")
+        self._queue: queue.Queue[Future | None] = queue.Queue()
+        self._futures: list[Future] = []
+        self._lock    = threading.Lock()
+        self._cancelled = threading.Event()
+        self._current: SpeechStream | None = None
+        self.started  = perf_counter()
+        self.ttfa: float | None = None          # time to first audio (s)
+
+    # ── producer side ────────────────────────────────────────────────
+    def feed(self, text: str) -> None:
+        """Queue every sentence in *text* for synthesis."""
+        for sentence in split_sentences(text):
+            self._submit(sentence)
+
+    def close(self) -> None:
+        """No more text will be fed."""
+        self._queue.put(None)
+
+    def cancel(self) -> None:
+        """Drop outstanding work and stop the sentence being played."""
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        with self._lock:
+            for fut in self._futures:
+                fut.cancel()
+        if self._current:
+            self._current.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._queue.put(None)
+
+    # ── consumer side ────────────────────────────────────────────────
+    def speech(self) -> SpeechStream:
+        """
+        Block until the first sentence's audio starts; return the whole.
+        Raises if the first sentence fails, so callers can fall back.
+        """
+        first = self._next(strict=True)
+        if first is None:
+            self._pool.shutdown(wait=False)
+            return SpeechStream(self._kw.get("sample_rate", 48_000), 1, 2, iter(()))
+        return SpeechStream(first.rate, first.channels, first.sampwidth,
+                            self._chunks(first))
+
+    def _chunks(self, cur: SpeechStream | None) -> Iterator[bytes]:
+        try:
+            while cur is not None:
+                self._current = cur
+                try:
+                    for chunk in cur.chunks:
+                        if self.ttfa is None:
+                            self.ttfa = perf_counter() - self.started
+                        yield chunk
+                finally:
+                    cur.close()
+                cur = self._next()
+        finally:
+            self.cancel()                  # early close → stop the rest
+            self._pool.shutdown(wait=False)
+
+    # ── helpers ──────────────────────────────────────────────────────
+    def _submit(self, sentence: str) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            first = not self._futures
+            fn  = self._stream_fn if first else self._fetch_fn
+            fut = self._pool.submit(fn, sentence, **self._kw)
+            if first:
+                fut.add_done_callback(self._close_if_cancelled)
+            self._futures.append(fut)
+        self._queue.put(fut)
+
+    def _close_if_cancelled(self, fut: Future) -> None:
+        if self._cancelled.is_set() and not fut.cancelled() and not fut.exception():
+            fut.result().close()
+
+    def _next(self, strict: bool = False) -> SpeechStream | None:
+        while not self._cancelled.is_set():
+            fut = self._queue.get()
+            if fut is None:
+                return None
+            try:
+                res = fut.result()
+            except CancelledError:
+                return None
+            except Exception:
+                if strict:
+                    self.cancel()
+                    raise
+                log.exception("sentence synthesis failed – skipping it")
+                continue
+            return res if isinstance(res, SpeechStream) else open_speech(res)
+        return None
+
+
+def pipelined_speech(text: str, **kw) -> SpeechStream:
+    """One-shot helper: synthesise *text* sentence by sentence."""
+    pipe = SpeechPipeline(**kw)
+    pipe.feed(text)
+    pipe.close()
+    return pipe.speech()
+
+
+# ─── CLI: time-to-first-audio, single call vs. pipeline ─────────────
+if __name__ == "__main__":
+    import time
+
+    # Latency model of a Watson synthesize call: fixed round trip plus
+    # synthesis time growing with text length (audio arrives at the end
+    # for the one-shot call, progressively for the streamed first sentence)
+    RTT, PER_CHAR = 0.35, 0.012
+
+    def fake_fetch(text, **_):
+        time.sleep(RTT + PER_CHAR * len(text))
+        return SpeechStream(48_000, 1, 2, iter([b"\0\0" * 4800]))
+
+    def fake_stream(text, **_):
+        time.sleep(RTT)
+        def chunks():
+            for _ in range(4):
+                time.sleep(PER_CHAR * len(text) / 4)
+                yield b"\0\0" * 1200
+        return SpeechStream(48_000, 1, 2, chunks())
+
+    reply = ("Try a warm bowl of vegetable soup with wholemeal bread. "
+             "It is light, easy to make and full of vitamins. "
+             "Add some lentils or beans if you would like more protein. "
+             "A piece of fruit afterwards makes a nice dessert. "
+             "Remember to drink a glass of water with your meal.")
+
+    t0 = time.perf_counter()
+    next(iter(fake_fetch(reply).chunks))
+    before = time.perf_counter() - t0
+
+    pipe = SpeechPipeline(stream_fn=fake_stream, fetch_fn=fake_fetch)
+    pipe.feed(reply)
+    pipe.close()
+    speech = pipe.speech()
+    for _ in speech.chunks:
+        pass
+    print(f"{len(split_sentences(reply))} sentences, {len(reply)} chars")
+    print(f"time to first audio – one call: {before * 1000:.0f} ms, "
+          f"pipeline: {pipe.ttfa * 1000:.0f} ms")
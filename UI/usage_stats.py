@@ -0,0 +1,80 @@
+"""What do people actually ask for? Slot statistics from nlu_log.csv.
+
+Every routed request is appended to ``nlu_log.csv`` (timestamp, raw text,
+intents, slots as JSON). SlotUsage tails that file – only the rows added
+since the last call are parsed – and ranks slot values by a recency-
+weighted count, so the kiosk can prefetch what its users ask about most.
+
+    usage = SlotUsage(log_dir / "nlu_log.csv")
+    usage.top("location", 4, intent="get_weather")   # ['Leeds', 'London', …]
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class SlotUsage:
+    """Recency-weighted counts of slot values, read incrementally from the log."""
+
+    def __init__(self, csv_path: str | os.PathLike, *, half_life_days: float = 30.0,
+                 max_rows: int = 20_000):
+        self.path = Path(csv_path)
+        self.half_life = half_life_days * 86400
+        self._offset = 0
+        self._rows: deque[tuple[float, tuple[str, ...], dict]] = deque(maxlen=max_rows)
+        self._lock = threading.Lock()
+
+    def top(self, slot: str, n: int, *, intent: str | None = None) -> list[str]:
+        """The *n* most asked-for values of *slot* (as most often spelled)."""
+        with self._lock:
+            self._read_new()
+            rows = list(self._rows)
+        now = time.time()
+        scores: Counter = Counter()
+        spellings: dict[str, Counter] = defaultdict(Counter)
+        for ts, intents, slots in rows:
+            value = slots.get(slot)
+            if not value or (intent and intent not in intents):
+                continue
+            key = " ".join(value.casefold().split())
+            scores[key] += math.exp2(-max(now - ts, 0) / self.half_life)
+            spellings[key][value.strip()] += 1
+        return [spellings[k].most_common(1)[0][0] for k, _ in scores.most_common(n)]
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _read_new(self) -> None:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self._offset:                  # rotated / truncated: start over
+            self._offset = 0
+            self._rows.clear()
+        if size == self._offset:
+            return
+        with self.path.open("rb") as fh:
+            fh.seek(self._offset)
+            chunk = fh.read()
+        end = chunk.rfind(b"\n") + 1             # leave a half-written row for later
+        self._offset += end
+        for row in csv.reader(io.StringIO(chunk[:end].decode("utf-8", "replace"))):
+            if len(row) < 4 or row[0] == "timestamp":
+                continue
+            try:
+                ts = datetime.fromisoformat(row[0]).replace(tzinfo=timezone.utc).timestamp()
+                slots = json.loads(row[3])
+            except ValueError:
+                continue
+            if not isinstance(slots, dict):
+                continue
+            self._rows.append((ts, tuple(row[2].split(",")), slots))
@@ -0,0 +1,263 @@
+"""Stale-while-revalidate cache for OpenWeather current conditions.
+
+The weather tile used to call OpenWeather on every refresh tick *and* on
+every "weather in …" command, even for the city it had just shown. Now:
+
+* readings are keyed by the normalised city ("  leeds" and "Leeds" are
+  one entry)
+* a reading younger than *ttl* is served without any network call
+* an older one is still returned at once, while a single background
+  refresh runs (concurrent askers join it instead of starting another);
+  callers get the fresh reading through their ``on_update`` callback
+* every successful refresh is written to a small JSON file, so after a
+  reboot the tile shows the last known weather straight away
+
+    reading = WEATHER.get("Leeds", on_update=show)   # None on a cold miss
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from gazetteer import location_params
+from http_client import HTTP
+
+log = logging.getLogger("weather")
+
+CURRENT_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+EMOJI = {
+    "Clear": "☀️", "Clouds": "☁️", "Rain": "🌧️", "Snow": "❄️",
+    "Thunderstorm": "⚡", "Drizzle": "🌦️",
+    "Mist": "🌫️", "Haze": "🌫️", "Fog": "🌁",
+}
+
+
+def normalise_city(city: str) -> str:
+    """Cache key for *city*: case-folded, punctuation and extra spaces removed."""
+    return " ".join(re.sub(r"[^\w\s-]", " ", city.casefold()).split())
+
+
+def fetch_current(city: str) -> dict:
+    """One OpenWeather current-conditions call (metric, English)."""
+    key = os.getenv("OPENWEATHER_KEY")
+    if not key:
+        raise RuntimeError("OPENWEATHER_KEY missing")
+    r = HTTP.get(CURRENT_URL, params=dict(location_params(city), appid=key,
+                                          units="metric", lang="en"), timeout=8)
+    r.raise_for_status()
+    return r.json()
+
+
+@dataclass
+class Reading:
+    city: str                  # as the user said it, for display
+    data: dict                 # raw OpenWeather payload
+    fetched_at: float          # time.time(), so it survives a restart
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def summary(self) -> tuple[str, str]:
+        """(emoji, "City: Clouds, 11.2 °C") for the weather tile."""
+        desc = self.data["weather"][0]["main"]
+        temp = self.data["main"]["temp"]
+        return EMOJI.get(desc, "🌈"), f"{self.city}: {desc}, {temp:.1f} °C"
+
+
+class WeatherCache:
+    """Per-city readings with a freshness TTL and one refresh in flight per city."""
+
+    def __init__(self, fetch=fetch_current, path: str | os.PathLike | None = None, *,
+                 ttl: float = 540.0, max_age: float = 6 * 3600, max_entries: int = 50,
+                 key=normalise_city, executor=None):
+        self._fetch      = fetch
+        self._key        = key               # city → cache key
+        self.path        = Path(path).expanduser() if path else None
+        self.ttl         = ttl               # fresh for this long: no API call
+        self.max_age     = max_age           # older than this is not shown at all
+        self.max_entries = max_entries
+        self._executor   = executor
+        self._entries: dict[str, Reading] = {}
+        self._inflight: dict[str, list] = {}  # key → callbacks waiting on it
+        self._lock  = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._started = time.monotonic()
+        self._stats = {"lookups": 0, "fresh": 0, "stale": 0, "misses": 0,
+                       "api_calls": 0, "api_errors": 0, "joined": 0, "prefetched": 0}
+        self._load()
+
+    # ── public API ────────────────────────────────────────────────────
+    def get(self, city: str, on_update=None) -> Reading | None:
+        """
+        The cached reading for *city* – fresh or stale – or None if there is
+        none worth showing. Unless it is fresh, a background refresh is
+        started (or joined) and ``on_update(reading, error)`` is called from
+        the worker thread when it finishes.
+        """
+        key = self._key(city)
+        with self._lock:
+            self._stats["lookups"] += 1
+            reading = self._entries.get(key)
+            if reading and reading.age > self.max_age:
+                reading = None
+            if reading and reading.age < self.ttl:
+                self._stats["fresh"] += 1
+                return reading
+            self._stats["stale" if reading else "misses"] += 1
+        self.refresh(city, on_update)
+        return reading
+
+    def refresh(self, city: str, on_update=None) -> bool:
+        """Fetch *city* in the background; False if a fetch was already running."""
+        key = self._key(city)
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if waiting is not None:
+                self._stats["joined"] += 1
+                if on_update:
+                    waiting.append(on_update)
+                return False
+            self._inflight[key] = [on_update] if on_update else []
+        if self._executor is not None:
+            self._executor.submit(self._revalidate, key, city)
+        else:
+            threading.Thread(target=self._revalidate, args=(key, city),
+                             name="weather-refresh", daemon=True).start()
+        return True
+
+    def prefetch(self, cities) -> int:
+        """
+        Refresh every city in *cities* that is not fresh, all at once (one
+        background fetch each, in parallel on the executor). Returns how
+        many fetches were started.
+        """
+        started = 0
+        for city in cities:
+            reading = self.peek(city)
+            if reading and reading.age < self.ttl:
+                continue
+            started += self.refresh(city)
+        with self._lock:
+            self._stats["prefetched"] += started
+        return started
+
+    def peek(self, city: str) -> Reading | None:
+        """The stored reading for *city*, however old, without side effects."""
+        with self._lock:
+            return self._entries.get(self._key(city))
+
+    def stats(self) -> dict:
+        hours = max((time.monotonic() - self._started) / 3600, 1 / 60)
+        with self._lock:
+            s = dict(self._stats)
+            entries = len(self._entries)
+        n = s["lookups"]
+        return {"entries": entries, "lookups": n,
+                "fresh_hits": s["fresh"], "stale_hits": s["stale"], "misses": s["misses"],
+                "hit_rate": (s["fresh"] + s["stale"]) / n if n else 0.0,
+                "fresh_rate": s["fresh"] / n if n else 0.0,
+                "api_calls": s["api_calls"], "api_errors": s["api_errors"],
+                "api_calls_per_hour": round(s["api_calls"] / hours, 1),
+                "joined_refreshes": s["joined"], "prefetched": s["prefetched"]}
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _revalidate(self, key: str, city: str) -> None:
+        reading, error = None, None
+        try:
+            data = self._fetch(city)
+            reading = Reading(city, data, time.time())
+        except Exception as e:
+            error = e
+            log.warning("[WEATHER] refresh for %r failed: %s", city, e)
+        with self._lock:
+            self._stats["api_calls"] += 1
+            self._stats["api_errors"] += error is not None
+            if reading:
+                self._entries[key] = reading
+                self._evict()
+            callbacks = self._inflight.pop(key, [])
+        if reading:
+            self._save()
+        for cb in callbacks:
+            try:
+                cb(reading, error)
+            except Exception:
+                log.exception("[WEATHER] update callback failed")
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k].fetched_at)
+            del self._entries[oldest]
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            self._entries = {k: Reading(**v) for k, v in raw.get("entries", {}).items()}
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("[WEATHER] ignoring unreadable cache %s: %s", self.path, e)
+
+    def _save(self) -> None:
+        """Write every entry atomically (temp file + os.replace)."""
+        if not self.path:
+            return
+        with self._lock:
+            body = json.dumps({"entries": {k: asdict(r) for k, r in self._entries.items()}})
+        with self._save_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    fh.write(body)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                Path(tmp).unlink(missing_ok=True)
+                log.warning("[WEATHER] could not save cache: %s", e)
+
+
+# ─── CLI: API calls for a typical hour of use, with and without the cache ───
+if __name__ == "__main__":
+    # one tick every 10 min plus voice queries, mostly for the shown city
+    TICKS   = [(t, "London") for t in range(0, 3600, 600)]
+    QUERIES = [(t, c) for t, c in [(65, "London"), (90, "london"), (400, "Leeds"),
+                                   (430, "Leeds "), (1250, "London"), (1900, "Leeds"),
+                                   (1915, "LEEDS"), (2600, "London"), (3300, "London")]]
+    events  = sorted(TICKS + QUERIES)
+    clock   = [1_700_000_000.0]
+    real_time = time.time
+    time.time = lambda: clock[0]
+
+    def fake_fetch(city):
+        return {"weather": [{"main": "Clouds"}], "main": {"temp": 11.0}}
+
+    class Inline:                                     # run refreshes synchronously
+        def submit(self, fn, *a):
+            fn(*a)
+
+    tmp = Path(tempfile.mkdtemp()) / "weather_cache.json"
+    cache = WeatherCache(fake_fetch, tmp, executor=Inline())
+    start = clock[0]
+    for t, city in events:
+        clock[0] = start + t
+        cache.get(city)
+    time.time = real_time
+
+    print(f"{len(events)} lookups in one hour ({len(TICKS)} timer ticks, "
+          f"{len(QUERIES)} voice queries)")
+    print(f"  without cache: {len(events)} API calls")
+    s = cache.stats()
+    print(f"  with cache   : {s['api_calls']} API calls, hit rate {s['hit_rate']:.0%} "
+          f"({s['fresh_hits']} fresh, {s['stale_hits']} stale)")
+    boot = WeatherCache(fake_fetch, tmp, executor=Inline())
+    print(f"  after restart: {len(boot._entries)} cities on screen before any call")
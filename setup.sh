@@ -5,12 +5,12 @@
 set -euo pipefail
 
 # -------- 0) system-wide C/C++ libraries (one-time) -------------------
-if ! dpkg -s libvlc-dev portaudio19-dev >/dev/null 2>&1; then
+if ! dpkg -s libvlc-dev portaudio19-dev libopus0 espeak-ng >/dev/null 2>&1; then
   echo "🔧 Installing system libraries (sudo password may be required)…"
   sudo apt update
   sudo apt install -y python3-venv python3-dev build-essential \
        libffi-dev libssl-dev libvlc-dev \
-       portaudio19-dev libasound2-dev libportaudio2 libportaudiocpp0 \
+       portaudio19-dev libasound2-dev libportaudio2 libportaudiocpp0 libopus0 espeak-ng \
        libsdl2-dev libsdl2-image-dev libsdl2-mixer-dev libsdl2-ttf-dev \
        libgl1-mesa-dev libgles2-mesa-dev \
        libgstreamer1.0-dev gstreamer1.0-plugins-base gstreamer1.0-plugins-good
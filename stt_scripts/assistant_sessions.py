@@ -0,0 +1,219 @@
+"""Keep Watson Assistant sessions alive between turns.
+
+Creating and deleting a session around every message costs two extra round
+trips per turn and throws away the conversation. AssistantSessionPool keeps
+one session per user, reuses it while it is younger than the service's
+inactivity timeout, and transparently opens a new one (carrying the last
+context over) when it has expired or the service reports it as invalid.
+
+    pool = AssistantSessionPool(assistant, assistant_id, environment_id)
+    result = pool.message("what's the weather in leeds")
+
+Run ``python assistant_sessions.py`` for a latency comparison against a
+local fake Assistant server.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from ibm_cloud_sdk_core import ApiException
+
+log = logging.getLogger("assistant")
+
+
+class _Session:
+    __slots__ = ("id", "last_used", "context")
+
+    def __init__(self, session_id: str, now: float):
+        self.id, self.last_used, self.context = session_id, now, None
+
+
+class AssistantSessionPool:
+    """One live session per user key, renewed before the service drops it."""
+
+    def __init__(self, assistant, assistant_id: str, environment_id: str | None = None,
+                 *, idle_timeout: float = 300.0, margin: float = 15.0):
+        self.assistant      = assistant
+        self.assistant_id   = assistant_id
+        self.environment_id = environment_id
+        self.idle_timeout   = idle_timeout        # Assistant default: 5 min
+        self.margin         = margin
+        self._sessions: dict[str, _Session] = {}
+        self._lock  = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "expired": 0, "invalid": 0}
+
+    def message(self, text: str, *, user: str = "default") -> dict:
+        """Send *text* in *user*'s conversation; returns the API result."""
+        with self._lock:
+            sess = self._session(user)
+        try:
+            result = self._send(sess, text)
+        except ApiException as e:
+            if e.code != 404:
+                raise
+            # session dropped server-side (timeout, restart) – start over
+            log.info("[ASSISTANT] session %s invalid, recreating", sess.id)
+            with self._lock:
+                self._stats["invalid"] += 1
+                self._sessions.pop(user, None)
+                fresh = self._session(user)
+                fresh.context = sess.context
+            sess = fresh
+            result = self._send(sess, text)
+        sess.last_used = time.monotonic()
+        sess.context = result.get("context") or sess.context
+        return result
+
+    def close(self) -> None:
+        """Delete every open session (call on exit)."""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for sess in sessions:
+            try:
+                self.assistant.delete_session(assistant_id=self.assistant_id,
+                                              session_id=sess.id)
+            except ApiException:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, open=len(self._sessions))
+
+    # ── helpers ───────────────────────────────────────────────────────
+    def _session(self, user: str) -> _Session:
+        now = time.monotonic()
+        sess = self._sessions.get(user)
+        if sess and now - sess.last_used < self.idle_timeout - self.margin:
+            self._stats["reused"] += 1
+            return sess
+        if sess:
+            self._stats["expired"] += 1
+        result = self.assistant.create_session(assistant_id=self.assistant_id).get_result()
+        fresh = _Session(result["session_id"], now)
+        if sess:
+            fresh.context = sess.context          # keep the conversation going
+        self._sessions[user] = fresh
+        self._stats["created"] += 1
+        return fresh
+
+    def _send(self, sess: _Session, text: str) -> dict:
+        kw = {"context": sess.context} if sess.context else {}
+        return self.assistant.message(
+            assistant_id=self.assistant_id,
+            environment_id=self.environment_id,
+            session_id=sess.id,
+            input={"message_type": "text", "text": text,
+                   "options": {"return_context": True}},
+            **kw,
+        ).get_result()
+
+
+# ─── fake Assistant server + latency benchmark ──────────────────────
+def _serve_fake_assistant(rtt: float = 0.08, session_timeout: float = 300.0):
+    """
+    Local stand-in for the Assistant v2 REST API: sessions, message (echo,
+    with a turn counter kept in the context) and delete. Every request
+    takes *rtt* seconds; sessions idle longer than *session_timeout* 404.
+    """
+    import json
+    import re
+    import uuid
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    sessions: dict[str, float] = {}
+    path_re = re.compile(r"/v2/assistants/[^/]+/sessions(?:/([^/?]+))?(/message)?")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self):
+            time.sleep(rtt)
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            m = path_re.match(self.path)
+            return (m.group(1), m.group(2), json.loads(body or b"{}")) if m else (None, None, None)
+
+        def _alive(self, sid):
+            seen = sessions.get(sid)
+            if seen is None or time.monotonic() - seen > session_timeout:
+                sessions.pop(sid, None)
+                self._reply(404, {"error": "Invalid Session", "code": 404})
+                return False
+            sessions[sid] = time.monotonic()
+            return True
+
+        def do_POST(self):
+            sid, message, body = self._route()
+            if sid is None:
+                sid = str(uuid.uuid4())
+                sessions[sid] = time.monotonic()
+                return self._reply(201, {"session_id": sid})
+            if message and self._alive(sid):
+                turn = body.get("context", {}).get("skills", {}) \
+                           .get("main skill", {}).get("user_defined", {}).get("turn", 0) + 1
+                self._reply(200, {
+                    "output": {"generic": [{"response_type": "text",
+                                            "text": f"turn {turn}: {body['input']['text']}"}]},
+                    "context": {"skills": {"main skill": {"user_defined": {"turn": turn}}}},
+                })
+
+        def do_DELETE(self):
+            sid, _, _ = self._route()
+            sessions.pop(sid, None)
+            self._reply(200, {})
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+    from ibm_watson import AssistantV2
+
+    TURNS = 20
+    server = _serve_fake_assistant(rtt=0.08, session_timeout=1.0)
+    assistant = AssistantV2(version="2021-06-14", authenticator=NoAuthAuthenticator())
+    assistant.set_service_url(f"http://127.0.0.1:{server.server_port}")
+
+    def reply_text(result):
+        return result["output"]["generic"][0]["text"]
+
+    # before: create → message → delete on every transcript
+    t0 = time.perf_counter()
+    for i in range(TURNS):
+        sid = assistant.create_session(assistant_id="a").get_result()["session_id"]
+        result = assistant.message(assistant_id="a", environment_id="e", session_id=sid,
+                                   input={"message_type": "text", "text": f"hello {i}"}
+                                   ).get_result()
+        assistant.delete_session(assistant_id="a", session_id=sid)
+    before = (time.perf_counter() - t0) / TURNS
+    print(f"per-turn session   : {before * 1000:6.0f} ms/turn, last reply {reply_text(result)!r}")
+
+    # after: pooled session, context kept across turns
+    pool = AssistantSessionPool(assistant, "a", "e")
+    t0 = time.perf_counter()
+    for i in range(TURNS):
+        result = pool.message(f"hello {i}")
+    after = (time.perf_counter() - t0) / TURNS
+    print(f"session pool       : {after * 1000:6.0f} ms/turn, last reply {reply_text(result)!r}")
+
+    # the server forgets the session; the pool recovers and keeps the context
+    time.sleep(1.1)
+    print(f"after server expiry: {reply_text(pool.message('still there?'))!r}")
+    print("pool stats:", pool.stats())
+    pool.close()
+    server.shutdown()
@@ -2,13 +2,14 @@
 # python live_transcribe.py -t 10
 
 from ibm_watson import AssistantV2, TextToSpeechV1
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
 
 import tempfile
 import os
+import sys
 import simpleaudio as sa
 
 import argparse
+import atexit
 import base64
 import configparser
 import json
@@ -20,6 +21,11 @@ import websocket
 from websocket._abnf import ABNF
 import certifi
 
+# shared IAM token / client manager lives next to the kiosk app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'UI'))
+from ibm_auth import IBM
+from assistant_sessions import AssistantSessionPool
+
 # Audio configuration
 CHUNK = 1024
 FORMAT = pyaudio.paInt16
@@ -28,42 +34,44 @@ RATE = 44100
 FINALS = []
 LAST = None
 
+_CONFIG = None
+
+def read_config():
+    """Parse speech.cfg once per process."""
+    global _CONFIG
+    if _CONFIG is None:
+        _CONFIG = configparser.RawConfigParser()
+        _CONFIG.read('speech.cfg')
+    return _CONFIG
+
+ENVIRONMENT_ID = '48bceb2d-d598-4677-866a-a62a3946e656'  # Live environment
+_SESSIONS = None
+
+def assistant_sessions():
+    """The process-wide session pool (sessions survive across turns)."""
+    global _SESSIONS
+    if _SESSIONS is None:
+        config = read_config()
+        assistant_apikey = config.get('assistant', 'apikey')
+        assistant_id = config.get('assistant', 'assistant_id')
+        assistant_url = config.get('assistant', 'url')
+
+        # long-lived client: IAM token and connections reused across messages
+        assistant = IBM.service(AssistantV2, assistant_apikey, assistant_url,
+                                version='2021-06-14')
+        _SESSIONS = AssistantSessionPool(assistant, assistant_id, ENVIRONMENT_ID)
+        atexit.register(_SESSIONS.close)
+    return _SESSIONS
+
 #chatbot handler function
 def send_to_assistant(message_text):
-    config = configparser.RawConfigParser()
-    config.read('speech.cfg')
-    assistant_apikey = config.get('assistant', 'apikey')
-    assistant_id = config.get('assistant', 'assistant_id')
-    assistant_url = config.get('assistant', 'url')
-
-    authenticator = IAMAuthenticator(assistant_apikey)
-    assistant = AssistantV2(
-        version='2021-06-14',
-        authenticator=authenticator
-    )
-    assistant.set_service_url(assistant_url)
-
-    session = assistant.create_session(assistant_id=assistant_id).get_result()
-    session_id = session['session_id']
-
-    try:
-        response = assistant.message(
-            assistant_id=assistant_id,
-            session_id=session_id,
-            environment_id='48bceb2d-d598-4677-866a-a62a3946e656',
-            input={
-                'message_type': 'text',
-                'text': message_text
-            }
-        ).get_result()
-
-        output = response.get('output', {}).get('generic', [])
-        for entry in output:
-            if entry.get('response_type') == 'text':
-                print("Watson Assistant: ", entry['text'])
-                os.system(f'say {entry["text"]}') # macOS text-to-speech command
-    finally:
-        assistant.delete_session(assistant_id=assistant_id, session_id=session_id)
+    response = assistant_sessions().message(message_text)
+
+    output = response.get('output', {}).get('generic', [])
+    for entry in output:
+        if entry.get('response_type') == 'text':
+            print("Watson Assistant: ", entry['text'])
+            os.system(f'say {entry["text"]}') # macOS text-to-speech command
 
 def read_audio(ws, timeout):
     global RATE
@@ -136,8 +144,7 @@ def on_open(ws):
 
 
 def get_auth_and_url():
-    config = configparser.RawConfigParser()
-    config.read('speech.cfg')
+    config = read_config()
     region = config.get('auth', 'region')
     apikey = config.get('auth', 'apikey')
 